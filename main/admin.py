@@ -1,23 +1,178 @@
-from django.contrib import admin
+import csv
+import io
+import os
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
+from django.core.paginator import Paginator
+from django.db.models import BooleanField, Case, Value, When
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+
+from main import profiling, timing
+from main.caching import get_current_con
+from main.forms import GameForm, ImportForm
+from main.importing import FORMS as IMPORT_FORMS, import_csv
 from main.models import Pie, Game, Convention
+from main.search import search
+
+class CappedCountPaginator(Paginator):
+    """
+    Paginator that stops counting at settings.ADMIN_COUNT_LIMIT rows, so that a
+    changelist page doesn't have to count a whole large table.
+    """
+    @cached_property
+    def count(self):
+        return self.object_list[:settings.ADMIN_COUNT_LIMIT].count()
+
+class FullTextSearchMixin:
+    """Makes the changelist search box use the full-text index in search.py."""
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search(queryset, search_term), False
 
-class PieAdmin(admin.ModelAdmin):
+class PieAdmin(FullTextSearchMixin, admin.ModelAdmin):
     fields = ['text', 'owner', 'person_name', 'date_added', 'convention']
     list_display = ('text', 'owner', 'person_name', 'convention', 'date_added')
     list_filter = ['convention', 'date_added']
-    date_hierarchy = 'date_added'
+    list_select_related = ['owner', 'convention']
     ordering = ['-date_added']
+    search_fields = ['text', 'person_name']
+    paginator = CappedCountPaginator
+    show_full_result_count = False
 
-class GameAdmin(admin.ModelAdmin):
+class GameAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    # Checks the number of players and length as the site does. GameForm only
+    # lists the fields visitors fill in, so name them all here.
+    form = GameForm
+    fields = ['title', 'owner', 'gamemaster', 'system', 'num_players',
+        'length', 'description', 'date_added', 'suppress_from_display',
+        'convention']
     list_display = ('title', 'owner', 'date_added', 'convention', 'is_displayed')
     list_filter = ['convention', 'date_added', 'owner']
-    date_hierarchy = 'date_added'
+    list_select_related = ['owner', 'convention']
     ordering = ['-date_added']
     search_fields = ['title', 'gamemaster', 'system', 'description']
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Work out whether each game is shown on the site in the query."""
+        queryset = super().get_queryset(request)
+        current_con = get_current_con(request)
+        if current_con is None:
+            return queryset.annotate(
+                displayed=Value(False, output_field=BooleanField()))
+        return queryset.annotate(displayed=Case(
+            When(convention_id=current_con.pk, suppress_from_display=False,
+                then=Value(True)),
+            default=Value(False), output_field=BooleanField()))
+
+    def is_displayed(self, game):
+        return game.displayed
+
+    is_displayed.admin_order_field = 'displayed'
+    is_displayed.boolean = True
+    is_displayed.short_description = 'Show on site?'
 
 class ConventionAdmin(admin.ModelAdmin):
-    list_display = ('description', 'date_range_short', 'date_range_long')
+    list_display = ('description', 'date_range_short', 'date_range_long',
+        'displayed_game_count', 'game_count', 'pie_count')
     ordering = ['-start_date']
+    actions = ['import_registrations']
+
+    def get_urls(self):
+        urls = [
+            path('<int:convention_id>/import/',
+                self.admin_site.admin_view(self.import_view),
+                name='main_convention_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_registrations(self, request, queryset):
+        """Admin action that leads to the import page for one convention."""
+        if queryset.count() != 1:
+            self.message_user(request, "Select one convention to import into.",
+                messages.WARNING)
+            return None
+        return HttpResponseRedirect(reverse('admin:main_convention_import',
+            args=[queryset.get().pk]))
+
+    import_registrations.short_description = (
+        "Import games or pies from a CSV file")
+
+    def import_view(self, request, convention_id):
+        """Upload a CSV of games or pies to add to a convention."""
+        convention = get_object_or_404(Convention, pk=convention_id)
+        errors = []
+        if request.method != 'POST':
+            form = ImportForm()
+        else:
+            form = ImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                kind = form.cleaned_data['kind']
+                opts = IMPORT_FORMS[kind]._meta.model._meta
+                if not request.user.has_perm('%s.%s' % (opts.app_label,
+                        get_permission_codename('add', opts))):
+                    form.add_error('kind',
+                        "You don't have permission to add %s." % kind)
+            if form.is_valid():
+                csv_file = io.TextIOWrapper(form.cleaned_data['csv_file'],
+                    encoding='utf-8-sig')
+                try:
+                    result = import_csv(kind, csv_file, convention,
+                        request.user, form.cleaned_data['skip_invalid'])
+                except UnicodeDecodeError:
+                    form.add_error('csv_file',
+                        "The file isn't UTF-8 encoded text.")
+                except csv.Error as e:
+                    form.add_error('csv_file', "The file isn't valid CSV: %s"
+                        % e)
+            if form.is_valid():
+                errors = result.errors
+                if result.created or not errors:
+                    self.message_user(request, "Imported %d %s into %s." % (
+                        result.created, kind, convention))
+                    if not errors:
+                        return HttpResponseRedirect(reverse(
+                            'admin:main_convention_changelist'))
+
+        context = dict(self.admin_site.each_context(request),
+            title="Import games or pies into %s" % convention,
+            opts=self.model._meta, convention=convention, form=form,
+            errors=errors)
+        return render(request, 'admin/main/convention/import.html', context)
+
+def timings_view(request):
+    """
+    Request time percentiles per URL name, from this server process's
+    ServerTimingMiddleware samples. POST to start over.
+    """
+    if request.method == 'POST':
+        timing.clear()
+        return HttpResponseRedirect(request.path)
+    context = dict(admin.site.each_context(request), title="Request timings",
+        rows=timing.summary(), samples=settings.TIMING_SAMPLES)
+    return render(request, 'admin/main/timings.html', context)
+
+def profiles_view(request):
+    """The saved profiles of slow or sampled requests."""
+    context = dict(admin.site.each_context(request), title="Request profiles",
+        files=profiling.list_files(), settings=settings)
+    return render(request, 'admin/main/profiles.html', context)
+
+def profile_download_view(request, name):
+    """Download one of the saved profiles."""
+    if name not in [file.name for file in profiling.list_files()]:
+        raise Http404
+    response = FileResponse(open(os.path.join(settings.PROFILE_DIR, name),
+        'rb'), content_type='application/octet-stream')
+    response['Content-Disposition'] = 'attachment; filename="%s"' % name
+    return response
 
 admin.site.register(Pie, PieAdmin)
 admin.site.register(Game, GameAdmin)
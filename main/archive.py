@@ -0,0 +1,101 @@
+"""
+Archive pages for past conventions.
+
+A past convention's games and pies don't change (short of an admin editing
+them), so the registry part of its archive page is rendered once, stored as a
+ConventionArchive, and served from the cache with an ETag. Only the page
+around it (which shows who's logged in) is rendered for each request.
+
+Saving or deleting any of its games or pies, or the convention itself, throws
+the stored registries away, and they're rendered again the next time they're
+asked for, as they are after a deploy (which changes settings.ETAG_SALT). The
+build_archives command renders them all ahead of time.
+"""
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from piecon.routers import use_primary
+
+from .caching import get_current_con
+from .models import Convention, ConventionArchive
+from .rendering import game_rows, pie_rows
+
+Snapshot = namedtuple('Snapshot', ['etag', 'convention', 'html'])
+
+def _cache_key(convention_id):
+    return 'main:archive_rows:%s' % convention_id
+
+def past_conventions():
+    """Every convention except the current one, newest first."""
+    current_con = get_current_con()
+    conventions = Convention.objects.order_by('-start_date')
+    if current_con is not None:
+        conventions = conventions.exclude(pk=current_con.pk)
+    return conventions
+
+def render_archive(convention):
+    """Render a convention's archived registries and store them."""
+    context = {
+        'convention': convention,
+        'game_rows': game_rows(list(convention.game_set.filter(
+            suppress_from_display=False).order_by('-date_added', '-id'))),
+        'pie_rows': pie_rows(list(convention.pie_set.order_by(
+            '-date_added', '-id'))),
+    }
+    # Rendered without a request, so it's the same for every visitor.
+    html = render_to_string('main/archive_rows.html', context)
+    etag = hashlib.md5(html.encode('utf-8')).hexdigest()
+    ConventionArchive.objects.update_or_create(convention=convention,
+        defaults={'html': html, 'etag': etag,
+            'source_version': settings.ETAG_SALT})
+    return Snapshot(etag, convention, html)
+
+def get_archive(convention_id):
+    """
+    Return a past convention's archived registries as a Snapshot, rendering
+    them if need be, or None if there's no such past convention.
+    """
+    key = _cache_key(convention_id)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    current_con = get_current_con()
+    if current_con is not None and current_con.pk == convention_id:
+        return None
+    # Stored for everyone, so never from a lagging read replica.
+    with use_primary():
+        archive = ConventionArchive.objects.select_related(
+            'convention').filter(convention_id=convention_id).first()
+        if (archive is not None and
+                archive.source_version == settings.ETAG_SALT):
+            snapshot = Snapshot(archive.etag, archive.convention,
+                archive.html)
+        else:
+            try:
+                convention = Convention.objects.get(pk=convention_id)
+            except Convention.DoesNotExist:
+                return None
+            snapshot = render_archive(convention)
+    cache.set(key, snapshot, settings.ARCHIVE_CACHE_TIMEOUT)
+    return snapshot
+
+def invalidate_archive(convention_id, using='default', skip_current=True):
+    """
+    Throw away a convention's archive page. With 'skip_current' nothing is
+    done for the current convention, which has no archive page, saving a
+    query on every registration.
+    """
+    if convention_id is None:
+        return
+    if skip_current:
+        current_con = get_current_con()
+        if current_con is not None and current_con.pk == convention_id:
+            return
+    ConventionArchive.objects.using(using).filter(
+        convention_id=convention_id).delete()
+    cache.delete(_cache_key(convention_id))
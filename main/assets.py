@@ -0,0 +1,100 @@
+"""
+A small build step for the site's own CSS and JavaScript, run by the
+build_assets management command (and by bin/post_compile on Heroku).
+
+Each bundle in settings.ASSET_BUNDLES is concatenated from its source static
+files, minified, and written to main/static/<bundle name with a content hash>.
+A manifest maps bundle names to the hashed files, which the {% asset_bundle %}
+tag uses.
+
+Compression is left to collectstatic: on Heroku WhiteNoise's
+GzipManifestStaticFilesStorage hashes every collected file again and writes
+the .gz and (with brotlipy installed, see requirements.txt) .br copies of the
+names it actually serves, with far-future, immutable cache headers.
+"""
+import hashlib
+import json
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+STATIC_ROOT = os.path.join(os.path.dirname(__file__), 'static')
+MANIFEST_NAME = 'main/dist/manifest.json'
+
+def minify_css(css):
+    """Strip comments and unneeded whitespace from a stylesheet."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+def minify_js(js):
+    """
+    Strip indentation, blank lines and whole-line comments from a script.
+    (Anything cleverer needs a real JavaScript parser.)
+    """
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines
+        if line and not line.startswith('//'))
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def hashed_name(name, content):
+    """'main/dist/site.css' -> 'main/dist/site.0123456789ab.css'"""
+    root, ext = os.path.splitext(name)
+    return '%s.%s%s' % (root, hashlib.md5(content).hexdigest()[:12], ext)
+
+def build_bundle(name, sources):
+    """Write one bundle and return its hashed name."""
+    minify = MINIFIERS[os.path.splitext(name)[1]]
+    parts = []
+    for source in sources:
+        path = finders.find(source)
+        if path is None:
+            raise ValueError("Can't find static file '%s' for bundle '%s'."
+                % (source, name))
+        with open(path, encoding='utf-8') as f:
+            parts.append(minify(f.read()))
+    content = '\n'.join(parts).encode('utf-8')
+
+    output_name = hashed_name(name, content)
+    output_path = os.path.join(STATIC_ROOT, output_name)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'wb') as f:
+        f.write(content)
+    return output_name
+
+def build_all():
+    """Build every bundle in settings.ASSET_BUNDLES and write the manifest."""
+    manifest = {name: build_bundle(name, sources)
+        for name, sources in settings.ASSET_BUNDLES.items()}
+    with open(os.path.join(STATIC_ROOT, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+_manifest = None
+
+def load_manifest():
+    """Return the built manifest, or an empty one if nothing was built."""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(STATIC_ROOT, MANIFEST_NAME)) as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+def bundle_files(name):
+    """
+    Return the static file names to include for bundle 'name': the built
+    bundle if there is one (and DEBUG is off), otherwise its sources.
+    """
+    if not settings.DEBUG:
+        built = load_manifest().get(name)
+        if built:
+            return [built]
+    return settings.ASSET_BUNDLES[name]
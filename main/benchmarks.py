@@ -0,0 +1,146 @@
+"""
+View-level benchmarks for the benchmark_views command: wall time, query count
+and response size for the public pages and the admin changelists, measured
+with the test client against a throwaway database filled by fake_data.py.
+
+Also the template benchmark for the benchmark_templates command, which times
+rendering the game rows alone.
+"""
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.template import Context, Engine, engines
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .fake_data import generate
+from .models import Convention, Game, Pie
+from .rendering import game_rows
+
+# (name, URL name, needs a staff login)
+TARGETS = [
+    ('index', 'main:index', False),
+    ('games', 'main:games', False),
+    ('pies', 'main:pies', False),
+    ('admin_games', 'admin:main_game_changelist', True),
+    ('admin_pies', 'admin:main_pie_changelist', True),
+    ('admin_conventions', 'admin:main_convention_changelist', True),
+]
+
+def measure(client, url, repeat=5, using='default', warm=True):
+    """
+    Request 'url' 'repeat' times and return its timings in milliseconds, the
+    query count and the response size in bytes. With warm=False the cache is
+    cleared before every request.
+    """
+    timings = []
+    for _ in range(repeat):
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connections[using]) as queries:
+            start = time.perf_counter()
+            response = client.get(url)
+            content = response.content
+            elapsed = time.perf_counter() - start
+        timings.append(elapsed * 1000)
+    return {
+        'status': response.status_code,
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': len(queries),
+        'bytes': len(content),
+    }
+
+def clear_data(using='default'):
+    """Remove everything generate() adds."""
+    for model in [Game, Pie, Convention]:
+        model.objects.using(using).all().delete()
+    User.objects.using(using).filter(is_staff=False).delete()
+    cache.clear()
+
+def run(client, sizes, repeat=5, using='default'):
+    """
+    For each size, fill the database with that many games and pies and
+    measure every target cold (empty cache) and warm. Returns a list of result
+    dicts, one per size and target.
+    """
+    staff, created = User.objects.using(using).get_or_create(
+        username='benchmark-staff', defaults={'is_staff': True,
+            'is_superuser': True})
+    results = []
+    for size in sizes:
+        clear_data(using)
+        generate(conventions=5, users=max(size // 10, 1), games=size,
+            pies=size, using=using)
+        for name, url_name, needs_staff in TARGETS:
+            client.logout()
+            if needs_staff:
+                client.force_login(staff)
+            url = reverse(url_name)
+            results.append({
+                'size': size,
+                'target': name,
+                'cold': measure(client, url, repeat, using, warm=False),
+                'warm': measure(client, url, repeat, using, warm=True),
+            })
+    return results
+
+
+# The game rows as games.html rendered them before main/rendering.py, with a
+# {% url %} per row, to compare against.
+BASELINE_GAME_ROWS = """{% for game in games %}
+    <div class='gameDescription' data-id="{{ game.id }}">
+      <h4>{{ game.title }}</h4>
+      <p class='meta'>Gamemaster: <strong>{{ game.gamemaster }}</strong> -
+        System: <strong>{{ game.system }}</strong> -
+        Players: <strong>{{ game.num_players }}</strong> -
+        Length: <strong>{{ game.length }} hour(s)</strong></p>
+      <p>{{ game.description|linebreaks }}
+      </p>
+      <a class="btn btn-primary btn-xs edit-link owner-{{ game.owner_id }}"
+        href="{% url 'main:edit_game' game.id %}">
+        <span class="glyphicon glyphicon-edit" aria-hidden="true"></span>
+        edit</a>
+    </div>
+{% endfor %}"""
+
+def sample_games(count):
+    """Unsaved games to render, so the timings leave out the database."""
+    return [Game(id=i + 1, owner_id=i % 50 + 1, title="Game %d" % i,
+        gamemaster="Gamemaster %d" % i, system="System %d" % (i % 20),
+        num_players=i % 8 + 1, length=i % 6 + 1,
+        description="First line of game %d.\n\nSecond paragraph." % i)
+        for i in range(count)]
+
+def time_render(render, repeat):
+    """The median time of 'repeat' calls to render(), in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def measure_rows(rows=1000, repeat=5):
+    """
+    Time rendering 'rows' game rows with the old per-row {% url %} template
+    and with the row templates on each configured template engine. Returns
+    the times in milliseconds per 1,000 rows.
+    """
+    games = sample_games(rows)
+    baseline = Engine.get_default().from_string(BASELINE_GAME_ROWS)
+    context = {'games': games}
+    results = {'rows': rows, 'baseline': time_render(
+        lambda: baseline.render(Context(context)), repeat)}
+
+    rendered = game_rows(games)
+    for engine in engines.all():
+        rendered.engine = engine.name
+        results[engine.name] = time_render(rendered.render, repeat)
+    scale = 1000 / rows if rows else 0
+    return dict(results, **{name: round(ms * scale, 3)
+        for name, ms in results.items() if name != 'rows'})
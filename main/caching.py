@@ -0,0 +1,98 @@
+"""
+Cache helpers for the PieCon site.
+
+The current convention is looked up on nearly every page, so it's kept in the
+Django cache and cleared by the signal handlers in main/signals.py whenever a
+Convention is saved or deleted.
+
+The rendered game and pie registries are cached as template fragments keyed on
+a per-convention version number. Saving or deleting a Game or Pie bumps the
+version, so stale fragments are simply never asked for again.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from piecon.routers import use_primary
+
+from .models import Convention
+
+CURRENT_CON_CACHE_KEY = 'main:current_con'
+
+# Stored in the cache when there are no conventions at all, so that an empty
+# database doesn't cost a query on every request either.
+NO_CONVENTION = 'no-convention'
+
+def _load_current_con():
+    """Return the current convention from the cache, or the database."""
+    current_con = cache.get(CURRENT_CON_CACHE_KEY)
+    if current_con is None:
+        try:
+            # Never cache a copy from a lagging read replica.
+            with use_primary():
+                current_con = Convention.objects.latest('start_date')
+        except Convention.DoesNotExist:
+            current_con = NO_CONVENTION
+        cache.set(CURRENT_CON_CACHE_KEY, current_con, None)
+
+    if current_con == NO_CONVENTION:
+        return None
+    return current_con
+
+def get_current_con(request=None):
+    """
+    Return the current upcoming convention, or None if there isn't one yet.
+    When a request is given, the value is memoized on it so that a view only
+    asks the cache once.
+    """
+    if request is None:
+        return _load_current_con()
+
+    if not hasattr(request, '_current_con'):
+        request._current_con = _load_current_con()
+    return request._current_con
+
+def invalidate_current_con():
+    """Forget the cached current convention."""
+    cache.delete(CURRENT_CON_CACHE_KEY)
+
+def _registry_version_key(model, convention_id):
+    return 'main:registry_version:%s:%s' % (model._meta.model_name,
+        convention_id)
+
+def get_registry_version(model, convention_id):
+    """
+    Return the current version of the 'model' registry (Game or Pie) for the
+    given convention.
+    """
+    key = _registry_version_key(model, convention_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1, so that a version which fell out
+        # of the cache can't come back with a number that was already used.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+def bump_registry_version(model, convention_id):
+    """Mark every cached 'model' registry fragment for a convention stale."""
+    key = _registry_version_key(model, convention_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Nothing cached yet, so there's nothing to make stale either.
+        get_registry_version(model, convention_id)
+    cache.set(_recently_changed_key(model, convention_id), True,
+        settings.REPLICA_STICKY_SECONDS)
+
+def _recently_changed_key(model, convention_id):
+    return 'main:registry_changed:%s:%s' % (model._meta.model_name,
+        convention_id)
+
+def registry_recently_changed(model, convention_id):
+    """
+    Whether the 'model' registry for a convention changed in the last
+    settings.REPLICA_STICKY_SECONDS, and so may be behind on the replicas.
+    """
+    return cache.get(_recently_changed_key(model, convention_id), False)
@@ -0,0 +1,88 @@
+"""
+ETags for the public pages, for use with Django's condition() decorator, so
+that repeat visitors and proxies get a body-less 304 when nothing changed.
+
+Each ETag is built only from data that's already cached (the current
+convention and the registry versions from caching.py), the logged in user, the
+query string and a per-release salt, so checking one costs no queries.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+
+from .archive import get_archive
+from .caching import get_current_con, get_registry_version
+from .models import Game
+
+_template_stamp = None
+
+def _templates_stamp():
+    """
+    The newest modification time of the app's templates, so that a deploy
+    which changes a page also changes its ETags.
+    """
+    global _template_stamp
+    if _template_stamp is None:
+        directories = [os.path.join(os.path.dirname(__file__), name)
+            for name in ['templates', 'jinja2']]
+        _template_stamp = max((os.path.getmtime(os.path.join(root, name))
+            for directory in directories
+            for root, dirs, files in os.walk(directory) for name in files),
+            default=0)
+    return _template_stamp
+
+def _convention_state(convention):
+    """Everything about the current convention that the pages show."""
+    if convention is None:
+        return None
+    return (convention.pk, convention.roman_num, convention.tagline,
+        convention.start_date, convention.end_date, convention.game_count,
+        convention.displayed_game_count, convention.pie_count)
+
+def page_etag(request, *parts):
+    """
+    Return an ETag for a page showing 'parts', personalized for the logged in
+    user (the navigation bar shows who is logged in).
+    """
+    user = request.user
+    key = repr((settings.ETAG_SALT, _templates_stamp(), request.path,
+        request.GET.urlencode(), user.pk, user.get_username()) + parts)
+    return hashlib.md5(key.encode()).hexdigest()
+
+def static_page_etag(request, *args, **kwargs):
+    """ETag for pages that only change between releases, e.g. About."""
+    return page_etag(request)
+
+def index_etag(request, *args, **kwargs):
+    """ETag for the home page, which shows the current convention."""
+    return page_etag(request, _convention_state(get_current_con(request)))
+
+def registry_etag(model):
+    """Return an ETag function for the 'model' (Game or Pie) registry."""
+    def etag(request, *args, **kwargs):
+        convention = get_current_con(request)
+        if convention is None:
+            return page_etag(request, None)
+        # The version changes along with the registry's count, so only the
+        # convention's name needs adding.
+        version = get_registry_version(model, convention.pk)
+        return page_etag(request, convention.pk, convention.roman_num,
+            version)
+    return etag
+
+def schedule_etag(request):
+    """ETag for the schedule, which depends on the games and the dates."""
+    convention = get_current_con(request)
+    if convention is None:
+        return page_etag(request, None)
+    version = get_registry_version(Game, convention.pk)
+    return page_etag(request, convention.pk, convention.start_date,
+        convention.end_date, version)
+
+def archive_etag(request, convention_id):
+    """ETag for a past convention's archive page, or None if there isn't one."""
+    snapshot = get_archive(convention_id)
+    if snapshot is None:
+        return None
+    return page_etag(request, snapshot.etag)
@@ -0,0 +1,45 @@
+"""
+The registration counters stored on each Convention (game_count,
+displayed_game_count and pie_count).
+
+The signal handlers in signals.py adjust them whenever a Game or Pie is saved or
+deleted. Code that bypasses save() (bulk_create(), update()) needs to call
+adjust_counts() or recount_conventions() itself.
+"""
+from django.db.models import Case, Count, F, IntegerField, Sum, When
+
+from .caching import invalidate_current_con
+from .models import Convention, Game, Pie
+
+def adjust_counts(convention_id, games=0, displayed_games=0, pies=0,
+        using='default'):
+    """
+    Add the given (possibly negative) amounts to a convention's counters, in a
+    single UPDATE so that concurrent registrations can't lose a count.
+    """
+    if convention_id is None or not (games or displayed_games or pies):
+        return
+    Convention.objects.using(using).filter(pk=convention_id).update(
+        game_count=F('game_count') + games,
+        displayed_game_count=F('displayed_game_count') + displayed_games,
+        pie_count=F('pie_count') + pies)
+    # The cached current convention carries the counters too.
+    invalidate_current_con()
+
+def recount_conventions(using='default'):
+    """Recompute every convention's counters from the games and pies tables."""
+    games = {row['convention']: row for row in Game.objects.using(using)
+        .values('convention').order_by().annotate(
+            games=Count('id'),
+            displayed_games=Sum(Case(When(suppress_from_display=False,
+                then=1), default=0, output_field=IntegerField())))}
+    pies = {row['convention']: row['pies'] for row in Pie.objects.using(using)
+        .values('convention').order_by().annotate(pies=Count('id'))}
+
+    for convention in Convention.objects.using(using).only('pk'):
+        counts = games.get(convention.pk, {})
+        Convention.objects.using(using).filter(pk=convention.pk).update(
+            game_count=counts.get('games', 0),
+            displayed_game_count=counts.get('displayed_games') or 0,
+            pie_count=pies.get(convention.pk, 0))
+    invalidate_current_con()
@@ -0,0 +1,81 @@
+"""
+Streaming export of the convention, game and pie tables, used by both the
+export_registry management command and the staff-only export view.
+
+Rows are read with values() and iterator(), so only one chunk of rows is held
+in memory at a time no matter how large the tables get. The rows are only
+read as the stream is consumed, after the view has returned, so the database
+to read from is picked up front and passed in as 'using'.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Convention, Game, Pie
+
+# The columns exported for each table, in order.
+EXPORTS = {
+    'conventions': (Convention, ['id', 'roman_num', 'tagline', 'start_date',
+        'end_date']),
+    'games': (Game, ['id', 'convention_id', 'title', 'owner_id',
+        'owner__username', 'gamemaster', 'system', 'num_players', 'length',
+        'description', 'date_added', 'suppress_from_display']),
+    'pies': (Pie, ['id', 'convention_id', 'text', 'owner_id',
+        'owner__username', 'person_name', 'date_added']),
+}
+
+FORMATS = ['csv', 'ndjson']
+
+DEFAULT_CHUNK_SIZE = 2000
+
+def export_rows(name, chunk_size=DEFAULT_CHUNK_SIZE, using=None):
+    """Yield every row of the 'name' export as a dict, in id order."""
+    model, fields = EXPORTS[name]
+    return (model.objects.using(using).values(*fields).order_by('pk')
+        .iterator(chunk_size=chunk_size))
+
+class _Echo:
+    """A file-like object that hands back what's written to it."""
+    def write(self, value):
+        return value
+
+def stream_csv(name, chunk_size=DEFAULT_CHUNK_SIZE, using=None):
+    """Yield the 'name' export as CSV lines, starting with a header row."""
+    fields = EXPORTS[name][1]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in export_rows(name, chunk_size, using):
+        yield writer.writerow([row[field] for field in fields])
+
+def stream_ndjson(names, chunk_size=DEFAULT_CHUNK_SIZE, using=None):
+    """
+    Yield each of the 'names' exports as newline delimited JSON, one object
+    per row, tagged with the name of the export it came from.
+    """
+    encoder = DjangoJSONEncoder()
+    for name in names:
+        for row in export_rows(name, chunk_size, using):
+            row['model'] = name
+            yield encoder.encode(row) + '\n'
+
+def stream_export(name, format, chunk_size=DEFAULT_CHUNK_SIZE, using=None):
+    """
+    Yield the 'name' export (or every table, for 'all') in the given format,
+    read from the 'using' database (by default, wherever the router says).
+    Raises ValueError for unknown names and formats, and for 'all' as CSV
+    since the tables don't share columns.
+    """
+    if format not in FORMATS:
+        raise ValueError("Unknown export format '%s'." % format)
+    if name == 'all':
+        if format == 'csv':
+            raise ValueError("CSV exports are one table at a time.")
+        names = list(EXPORTS)
+    elif name in EXPORTS:
+        names = [name]
+    else:
+        raise ValueError("Unknown export '%s'." % name)
+
+    if format == 'csv':
+        return stream_csv(name, chunk_size, using)
+    return stream_ndjson(names, chunk_size, using)
@@ -0,0 +1,134 @@
+"""
+Filters and facet counts for the game registry.
+
+The facets (system, gamemaster and length) show how many of the convention's
+games have each value, e.g. "D&D 5e (14)". Rather than one count query per
+value, one grouped query fetches the number of games for each combination of
+the columns the registry filters on. The groups are cached under the
+registry version (see caching.py), and every facet's counts are worked out
+from them in Python, so the page takes the same queries however many systems
+or gamemasters there are.
+
+A facet's counts apply the other filters but not its own, so picking "D&D 5e"
+still shows how many games the other systems have.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils.http import urlencode
+
+from .caching import get_registry_version
+from .models import Game
+
+# The facets shown, as (filter name, heading).
+FACETS = [
+    ('system', 'System'),
+    ('gamemaster', 'Gamemaster'),
+    ('length', 'Length'),
+]
+
+Facet = namedtuple('Facet', 'name label values')
+FacetValue = namedtuple('FacetValue', 'value label count selected query')
+
+# The columns games are grouped by, and so can be filtered on from the groups.
+GROUP_COLUMNS = ['system', 'gamemaster', 'length_hours', 'min_players',
+    'max_players']
+
+def filter_games(games, filters):
+    """
+    Narrow the 'games' queryset down by the 'filters' from GameFilterForm.
+    Each is an equality or range test on an indexed column (see Game.Meta).
+    """
+    if 'system' in filters:
+        games = games.filter(system=filters['system'])
+    if 'gamemaster' in filters:
+        games = games.filter(gamemaster=filters['gamemaster'])
+    if 'length' in filters:
+        games = games.filter(length_hours=filters['length'])
+    if 'players' in filters:
+        games = games.filter(max_players__gte=filters['players'],
+            min_players__lte=filters['players'])
+    if 'min_hours' in filters:
+        games = games.filter(length_hours__gte=filters['min_hours'])
+    if 'max_hours' in filters:
+        games = games.filter(length_hours__lte=filters['max_hours'])
+    return games
+
+def _group_matches(group, filters, skip):
+    """Whether a group passes the 'filters', as filter_games() would."""
+    system, gamemaster, hours, fewest, most, count = group
+    for name, value in filters.items():
+        if name == skip:
+            continue
+        if name == 'system' and system != value:
+            return False
+        if name == 'gamemaster' and gamemaster != value:
+            return False
+        if name == 'length' and hours != value:
+            return False
+        if name == 'players' and not (fewest is not None and
+                fewest <= value <= most):
+            return False
+        if name == 'min_hours' and not (hours is not None and hours >= value):
+            return False
+        if name == 'max_hours' and not (hours is not None and hours <= value):
+            return False
+    return True
+
+def _groups_key(convention_id, version):
+    return 'main:game_facets:%s:%s' % (convention_id, version)
+
+def facet_groups(convention_id):
+    """
+    The number of displayed games in a convention for each combination of
+    GROUP_COLUMNS, as a list of tuples ending with the count.
+    """
+    key = _groups_key(convention_id, get_registry_version(Game,
+        convention_id))
+    groups = cache.get(key)
+    if groups is None:
+        groups = list(Game.objects.filter(convention_id=convention_id,
+            suppress_from_display=False).values_list(*GROUP_COLUMNS)
+            .annotate(count=Count('id')).order_by())
+        cache.set(key, groups, settings.REGISTRY_CACHE_TIMEOUT)
+    return groups
+
+def _value_label(name, value):
+    if name == 'length':
+        return '%d hour%s' % (value, '' if value == 1 else 's')
+    return value
+
+def facet_counts(convention_id, filters, extra=None):
+    """
+    The FACETS for a convention's games narrowed down by 'filters'. Each value
+    comes with the query string that selects it (or, if it's selected, drops
+    it), keeping the other filters and any 'extra' parameters, e.g. the sort.
+    """
+    groups = facet_groups(convention_id)
+    facets = []
+    for name, label in FACETS:
+        column = {'length': 'length_hours'}.get(name, name)
+        index = GROUP_COLUMNS.index(column)
+        counts = {}
+        for group in groups:
+            if group[index] is not None and group[index] != '' and \
+                    _group_matches(group, filters, skip=name):
+                counts[group[index]] = counts.get(group[index], 0) + group[-1]
+        if name in filters:
+            counts.setdefault(filters[name], 0)
+
+        values = []
+        for value, count in sorted(counts.items(),
+                key=lambda item: (-item[1], item[0])):
+            selected = filters.get(name) == value
+            params = dict(filters, **(extra or {}))
+            if selected:
+                del params[name]
+            else:
+                params[name] = value
+            values.append(FacetValue(value, _value_label(name, value), count,
+                selected, urlencode(sorted(params.items()))))
+        facets.append(Facet(name, label, values))
+    return facets
@@ -0,0 +1,110 @@
+"""
+Synthetic conventions, users, games and pies, for load testing and the
+benchmark_views command. Everything is inserted with bulk_create(), so the
+search index, convention counters and caches are brought up to date at the
+end rather than by the per-object signal handlers.
+"""
+import datetime
+import random
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .caching import bump_registry_version
+from .counters import recount_conventions
+from .models import Convention, Game, Pie
+from .search import rebuild_index
+
+ROMAN_NUMERALS = [(1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'),
+    (100, 'C'), (90, 'XC'), (50, 'L'), (40, 'XL'), (10, 'X'), (9, 'IX'),
+    (5, 'V'), (4, 'IV'), (1, 'I')]
+
+SYSTEMS = ['D&D 5e', 'Pathfinder', 'Call of Cthulhu', 'Fate', 'Blades in the '
+    'Dark', 'Dungeon World', 'Shadowrun', 'Board games', 'Vampire', 'GURPS']
+WORDS = ['dragon', 'pie', 'heist', 'crypt', 'moon', 'tavern', 'curse', 'storm',
+    'crown', 'void', 'goblin', 'feast', 'tower', 'mystery', 'station', 'sword']
+PIES = ['Apple pie', 'Pecan pie', 'Cherry pie', 'Pumpkin pie', 'Key lime pie',
+    'Chips and salsa', 'Cheese plate', 'Cookies', 'Lemon bars', 'Soda']
+
+BATCH_SIZE = 1000
+
+def roman(num):
+    """Return 'num' as a roman numeral, e.g. 14 -> 'XIV'."""
+    result = ''
+    for value, letters in ROMAN_NUMERALS:
+        count, num = divmod(num, value)
+        result += letters * count
+    return result
+
+def _sentence(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+def generate(conventions=5, users=100, games=500, pies=500, seed=0,
+        using='default'):
+    """
+    Add 'conventions' conventions, one a year up to next year's, plus 'users'
+    users, and 'games' games and 'pies' pies spread across the conventions and
+    users. Returns the new conventions.
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    first_number = Convention.objects.using(using).count() + 1
+
+    new_conventions = []
+    for i in range(conventions):
+        start = (today + datetime.timedelta(days=30)
+            - datetime.timedelta(days=365 * (conventions - 1 - i)))
+        new_conventions.append(Convention(roman_num=roman(first_number + i),
+            tagline=_sentence(rng, 3).title(), start_date=start,
+            end_date=start + datetime.timedelta(days=2)))
+    Convention.objects.using(using).bulk_create(new_conventions)
+    new_conventions = list(Convention.objects.using(using)
+        .order_by('-pk')[:conventions])
+
+    # Hashing is slow on purpose, so every fake user shares one password.
+    password = make_password('piecon-fake-data')
+    # Usernames and emails are unique, so every run gets its own prefix.
+    prefix = 'fake%s_' % uuid.uuid4().hex[:8]
+    User.objects.using(using).bulk_create([
+        User(username='%s%d' % (prefix, i), email='%s%d@example.com'
+            % (prefix, i), password=password)
+        for i in range(users)], batch_size=BATCH_SIZE)
+    user_ids = list(User.objects.using(using)
+        .filter(username__startswith=prefix).values_list('pk', flat=True))
+
+    def date_added(convention):
+        start = datetime.datetime.combine(convention.start_date,
+            datetime.time(tzinfo=timezone.utc))
+        return start - datetime.timedelta(seconds=rng.randint(0, 180 * 86400))
+
+    def game(i):
+        convention = rng.choice(new_conventions)
+        game = Game(title=_sentence(rng, 3).title(), owner_id=rng.choice(user_ids),
+            gamemaster='GM %d' % rng.randint(1, max(users // 5, 1)),
+            system=rng.choice(SYSTEMS),
+            num_players='%d-%d' % (rng.randint(2, 4), rng.randint(4, 8)),
+            length=str(rng.randint(2, 6)), description=_sentence(rng, 40),
+            date_added=date_added(convention),
+            suppress_from_display=rng.random() < 0.05, convention=convention)
+        game.set_number_fields()
+        return game
+
+    def pie(i):
+        convention = rng.choice(new_conventions)
+        return Pie(text=rng.choice(PIES), owner_id=rng.choice(user_ids),
+            person_name='Person %d' % rng.randint(1, users),
+            date_added=date_added(convention), convention=convention)
+
+    for model, count, make in [(Game, games, game), (Pie, pies, pie)]:
+        for offset in range(0, count, BATCH_SIZE):
+            model.objects.using(using).bulk_create(
+                [make(i) for i in range(offset, min(offset + BATCH_SIZE,
+                    count))])
+        rebuild_index(model, using)
+        for convention in new_conventions:
+            bump_registry_version(model, convention.pk)
+    recount_conventions(using)
+
+    return new_conventions
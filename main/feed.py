@@ -0,0 +1,85 @@
+"""
+The change feed behind the registry pages' live updates: the games or pies
+of the current convention added, edited or hidden since a cursor, oldest
+change first, so a page can patch its list rather than reload it.
+
+Cursors are (last_modified, id) pairs encoded like the pagination cursors.
+Deleted rows, and rows moved to another convention, aren't in the feed; they
+drop out of the list on the next reload.
+"""
+import time
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Game, Pie
+from .pagination import decode_cursor, encode_cursor
+from .rendering import game_rows, pie_rows
+
+# name: (model, function rendering the rows, whether a row is displayed)
+FEEDS = {
+    'games': (Game, game_rows, lambda game: not game.suppress_from_display),
+    'pies': (Pie, pie_rows, lambda pie: True),
+}
+
+def latest_cursor(queryset):
+    """A cursor for the newest change in 'queryset', or None if it's empty."""
+    latest = queryset.order_by('-last_modified', '-id').only(
+        'last_modified', 'id').first()
+    if latest is None:
+        return None
+    return encode_cursor(latest.last_modified, latest.pk)
+
+def changes_after(queryset, cursor, limit):
+    """
+    The rows of 'queryset' changed after 'cursor' (all of them if cursor is
+    None), oldest change first. Returns at most 'limit' rows, and whether
+    there were more.
+    """
+    queryset = queryset.order_by('last_modified', 'id')
+    if cursor:
+        field = queryset.model._meta.get_field('last_modified')
+        value, pk = decode_cursor(cursor, field)
+        queryset = queryset.filter(Q(last_modified__gt=value) |
+            Q(last_modified=value, id__gt=pk))
+    rows = list(queryset[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+def changes(name, convention, cursor, wait=0):
+    """
+    The changes to feed 'name' for 'convention' after 'cursor', as a dict
+    ready to be sent as JSON. If there aren't any yet, wait up to 'wait'
+    seconds (capped at settings.FEED_MAX_WAIT, which is 0 unless the server
+    runs async workers) for some, checking the database every
+    settings.FEED_POLL_INTERVAL seconds so changes saved by other processes
+    are seen too. Empty responses say how long to wait before asking again.
+    Raises ValueError for an unknown feed or a bad cursor.
+    """
+    if name not in FEEDS:
+        raise ValueError("Unknown feed '%s'." % name)
+    model, render_rows, is_displayed = FEEDS[name]
+    convention_id = convention.pk if convention else None
+    queryset = model.objects.filter(convention_id=convention_id)
+
+    deadline = time.monotonic() + min(max(wait, 0), settings.FEED_MAX_WAIT)
+    rows, has_more = changes_after(queryset, cursor, settings.FEED_PAGE_SIZE)
+    while not rows and time.monotonic() < deadline:
+        time.sleep(settings.FEED_POLL_INTERVAL)
+        rows, has_more = changes_after(queryset, cursor,
+            settings.FEED_PAGE_SIZE)
+
+    if rows:
+        cursor = encode_cursor(rows[-1].last_modified, rows[-1].pk)
+    return {
+        'cursor': cursor,
+        'has_more': has_more,
+        'retry': 0 if rows else settings.FEED_RETRY,
+        'rows': [_feed_row(row, render_rows, is_displayed) for row in rows],
+    }
+
+def _feed_row(row, render_rows, is_displayed):
+    """A row of the feed. Hidden rows only say so, their content stays out."""
+    if not is_displayed(row):
+        return {'id': row.pk, 'displayed': False}
+    return {'id': row.pk, 'displayed': True,
+        'html': str(render_rows([row])).strip()}
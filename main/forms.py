@@ -1,7 +1,14 @@
+import re
+
 from django import forms
 
 from .models import Pie, Game
 
+# A number of players, e.g. '4' or '3-5', and the most a game may have (as
+# in GameFilterForm).
+MAX_PLAYERS = 99
+PLAYERS_RE = re.compile(r'^\s*(\d+)\s*(?:-\s*(\d+)\s*)?$')
+
 class PieForm(forms.ModelForm):
     class Meta:
         model = Pie
@@ -53,3 +60,75 @@ class GameForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'placeholder':
                 'Describe your game.'}),
             }
+
+    def clean_num_players(self):
+        """A number, or a range like 3-5, normalized to '3-5'."""
+        match = PLAYERS_RE.match(self.cleaned_data['num_players'])
+        if match is None:
+            raise forms.ValidationError(
+                "Enter a number of players, or a range like 3-5.")
+        fewest = int(match.group(1))
+        most = int(match.group(2) or fewest)
+        if fewest < 1 or most < fewest:
+            raise forms.ValidationError(
+                "Enter a range from the fewest to the most players, like 3-5.")
+        if most > MAX_PLAYERS:
+            raise forms.ValidationError(
+                "A game can have at most %d players." % MAX_PLAYERS)
+        return str(fewest) if fewest == most else '%d-%d' % (fewest, most)
+
+    def clean_length(self):
+        """A whole number of hours."""
+        length = self.cleaned_data['length'].strip()
+        if not length.isdigit() or int(length) < 1:
+            raise forms.ValidationError(
+                "Enter the length as a whole number of hours.")
+        return str(int(length))
+
+    def _post_clean(self):
+        super()._post_clean()
+        # The numbers the registry filters on, from the cleaned text.
+        self.instance.set_number_fields()
+
+class GameFilterForm(forms.Form):
+    """Narrows down and sorts the game registry (GET)."""
+    SORTS = [('newest', 'Newest first'), ('title', 'Title'),
+        ('system', 'System')]
+
+    sort = forms.ChoiceField(choices=SORTS, required=False, label='Sort by')
+    players = forms.IntegerField(required=False, min_value=1,
+        max_value=MAX_PLAYERS, label='Players')
+    min_hours = forms.IntegerField(required=False, min_value=1,
+        max_value=99, label='At least (hours)')
+    max_hours = forms.IntegerField(required=False, min_value=1,
+        max_value=99, label='At most (hours)')
+    # Picked from the facets (see facets.py), and kept when filtering again.
+    system = forms.CharField(required=False, max_length=200,
+        widget=forms.HiddenInput)
+    gamemaster = forms.CharField(required=False, max_length=200,
+        widget=forms.HiddenInput)
+    length = forms.IntegerField(required=False, min_value=1, max_value=99,
+        widget=forms.HiddenInput)
+
+    def filters(self):
+        """The valid filters given, as a dict (invalid ones are ignored)."""
+        self.is_valid()
+        return {name: value for name, value in
+            getattr(self, 'cleaned_data', {}).items()
+            if name != 'sort' and value not in (None, '')}
+
+    def sort_order(self):
+        """The sort picked, 'newest' unless a valid one was given."""
+        self.is_valid()
+        return getattr(self, 'cleaned_data', {}).get('sort') or 'newest'
+
+class ImportForm(forms.Form):
+    """Upload form for importing games or pies into a convention."""
+    kind = forms.ChoiceField(choices=[('games', 'Games'), ('pies', 'Pies')])
+    csv_file = forms.FileField(label='CSV file', help_text=(
+        "The header row names the fields (e.g. title, gamemaster, system, "
+        "num_players, length, description for games; person_name, text for "
+        "pies), plus an optional 'owner' username or email column. Rows "
+        "without an owner will belong to you."))
+    skip_invalid = forms.BooleanField(required=False,
+        label='Import the valid rows even if some rows have errors')
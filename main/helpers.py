@@ -1,3 +1,6 @@
+import math
+import re
+
 def ordinal(num):
     """Returns an ordinal of a number, e.g. 'st' in 1st or 'th' in 5th"""
     if num > 9:
@@ -18,3 +21,28 @@ def get_num_with_ordinal(num):
     """Displays an int along with its ordinal, e.g. 1st, 3rd, 28th, 101st"""
     num_with_ordinal = str(num) + ordinal(num)
     return num_with_ordinal
+
+# The largest number the numeric Game columns (PositiveSmallIntegerField) hold.
+MAX_SMALL_INT = 32767
+
+def player_range(num_players):
+    """
+    The fewest and most players in a number of players like '5' or '3-5', as
+    a (min, max) tuple, or (None, None) if it has no numbers or one too big
+    to store.
+    """
+    numbers = [int(n) for n in re.findall(r'\d+', num_players or '')]
+    if not numbers or max(numbers) > MAX_SMALL_INT:
+        return None, None
+    return min(numbers), max(numbers)
+
+def length_in_hours(length):
+    """
+    A length like '3', '2.5' or '4h' in whole hours, rounded up, or None if it
+    has no number or one too big to store.
+    """
+    match = re.search(r'\d+(?:\.\d+)?', length or '')
+    if match is None:
+        return None
+    hours = max(math.ceil(float(match.group())), 1)
+    return hours if hours <= MAX_SMALL_INT else None
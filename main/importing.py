@@ -0,0 +1,105 @@
+"""
+Batched import of pre-registered games and pies from CSV, used by the
+import_registrations management command and the convention admin.
+
+Every row is validated with GameForm/PieForm, owners are looked up for all rows
+at once, and the valid rows are inserted with bulk_create() inside a single
+transaction by registration.bulk_register(), which also brings the search
+index, convention counters and registry cache up to date.
+"""
+import csv
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .forms import GameForm, PieForm
+from .registration import bulk_register
+
+FORMS = {'games': GameForm, 'pies': PieForm}
+
+# Optional column naming the username (or email address) of each row's owner.
+OWNER_COLUMN = 'owner'
+
+class ImportResult:
+    """What an import did: how many rows were added, and which rows failed."""
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+    def __str__(self):
+        return "%d added, %d rows with errors" % (self.created,
+            len(self.errors))
+
+def _find_owners(names, using):
+    """
+    Return a dict of username and lower cased email -> User for the given
+    names. Emails are matched ignoring case, as users_with_email() does.
+    """
+    owners = {}
+    names = list(names)
+    # Stay well under SQLite's limit on query parameters.
+    for offset in range(0, len(names), 400):
+        chunk = names[offset:offset + 400]
+        for user in User.objects.using(using).filter(username__in=chunk):
+            owners[user.username] = user
+        emails = sorted({name.lower() for name in chunk if '@' in name})
+        if emails:
+            # Written to match the users_email_lower_uniq index, like
+            # users_with_email().
+            for user in User.objects.using(using).extra(where=[
+                    'LOWER("auth_user"."email") IN (%s)' % ', '.join(
+                        ['%s'] * len(emails)),
+                    '"auth_user"."email" <> \'\''], params=emails):
+                owners.setdefault(user.email.lower(), user)
+    return owners
+
+def import_csv(kind, csv_file, convention, default_owner=None,
+        skip_invalid=False, using='default'):
+    """
+    Import the 'kind' ('games' or 'pies') rows of an open text 'csv_file' into
+    'convention'. The CSV's header names the form fields, plus an optional
+    'owner' column; rows without an owner belong to 'default_owner'.
+
+    Unless 'skip_invalid' is set, nothing is imported when any row has errors.
+    Returns an ImportResult.
+    """
+    form_class = FORMS[kind]
+    model = form_class._meta.model
+    result = ImportResult()
+    rows = list(csv.DictReader(csv_file))
+    owners = _find_owners({row.get(OWNER_COLUMN, '').strip() for row in rows}
+        - {''}, using)
+
+    now = timezone.now()
+    objects = []
+    # Line 1 is the header.
+    for line, row in enumerate(rows, start=2):
+        owner_name = (row.get(OWNER_COLUMN) or '').strip()
+        owner = (owners.get(owner_name) or owners.get(owner_name.lower())
+            if owner_name else default_owner)
+        if owner is None:
+            result.add_error(line, "Unknown owner '%s'." % owner_name
+                if owner_name else "No owner given.")
+            continue
+
+        form = form_class(data=row)
+        if not form.is_valid():
+            for field, messages in form.errors.items():
+                result.add_error(line, '%s: %s' % (field, ' '.join(messages)))
+            continue
+        obj = form.save(commit=False)
+        obj.owner = owner
+        obj.date_added = now
+        obj.convention = convention
+        objects.append(obj)
+
+    if result.errors and not skip_invalid:
+        return result
+
+    bulk_register(model, objects, convention, using)
+
+    result.created = len(objects)
+    return result
@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from main.benchmarks import measure_rows
+
+class Command(BaseCommand):
+    help = ("Time rendering the game registry rows with the old per-row "
+        "{% url %} template and with the compiled row templates on each "
+        "template engine, in milliseconds per 1,000 rows.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000,
+            help="Number of game rows to render.")
+        parser.add_argument('--repeat', type=int, default=5,
+            help="Renders per template, the median time is reported.")
+
+    def handle(self, *args, **options):
+        results = measure_rows(options['rows'], options['repeat'])
+        self.stdout.write(json.dumps(results, indent=2))
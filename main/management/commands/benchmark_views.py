@@ -0,0 +1,60 @@
+import datetime
+import json
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from main.benchmarks import run
+
+class Command(BaseCommand):
+    help = ("Measure wall time, query count and response size of the public "
+        "pages and admin changelists at several data sizes, using a "
+        "throwaway test database, and write the results as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000',
+            help="Comma separated numbers of games (and pies) to test with.")
+        parser.add_argument('--repeat', type=int, default=5,
+            help="Requests per page, the median time is reported.")
+        parser.add_argument('--output', '-o',
+            help="File to write the JSON results to, instead of stdout.")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0,
+            autoclobber=True)
+        try:
+            results = run(Client(), sizes, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'created': datetime.datetime.utcnow().isoformat() + 'Z',
+            'commit': self.git_commit(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def git_commit(self):
+        """Return the current git commit, to tell runs apart, if there is one."""
+        try:
+            return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
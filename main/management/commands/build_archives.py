@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from main.archive import past_conventions, render_archive
+
+class Command(BaseCommand):
+    help = ("Render the archive page of every past convention that doesn't "
+        "have an up to date one (or all of them with --force).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+            help="Render every past convention's page again.")
+
+    def handle(self, *args, **options):
+        conventions = past_conventions()
+        if not options['force']:
+            conventions = conventions.filter(Q(archive__isnull=True) |
+                ~Q(archive__source_version=settings.ETAG_SALT))
+        for convention in conventions:
+            render_archive(convention)
+            self.stdout.write("Rendered the archive of %s." % convention)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.assets import build_all
+
+class Command(BaseCommand):
+    help = ("Bundle and minify the site's CSS and JavaScript into content "
+        "hashed files. Run before collectstatic, which compresses them.")
+
+    def handle(self, *args, **options):
+        try:
+            manifest = build_all()
+        except ValueError as e:
+            raise CommandError(e)
+        for name, built in sorted(manifest.items()):
+            self.stdout.write("%s -> %s" % (name, built))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.export import (EXPORTS, FORMATS, DEFAULT_CHUNK_SIZE,
+    stream_export)
+
+class Command(BaseCommand):
+    help = "Stream conventions, games or pies out of the database as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS) + ['all'],
+            help="Which table to export, or 'all' (NDJSON only).")
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--chunk-size', type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Number of rows fetched from the database at a time.")
+        parser.add_argument('--output', '-o',
+            help="File to write to, instead of standard output.")
+
+    def handle(self, *args, **options):
+        try:
+            lines = stream_export(options['name'], options['format'],
+                options['chunk_size'])
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from main.fake_data import generate
+
+class Command(BaseCommand):
+    help = "Bulk insert synthetic conventions, users, games and pies."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conventions', type=int, default=5)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--games', type=int, default=500)
+        parser.add_argument('--pies', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        conventions = generate(options['conventions'], options['users'],
+            options['games'], options['pies'], options['seed'],
+            options['database'])
+        self.stdout.write("Added %d conventions, %d users, %d games and %d "
+            "pies." % (len(conventions), options['users'], options['games'],
+                options['pies']))
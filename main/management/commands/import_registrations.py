@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main.caching import get_current_con
+from main.importing import FORMS, import_csv
+from main.models import Convention
+
+class Command(BaseCommand):
+    help = ("Import pre-registered games or pies from a CSV file whose "
+        "header names the form fields, plus an optional 'owner' column.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(FORMS))
+        parser.add_argument('csv_file')
+        parser.add_argument('--convention',
+            help="Roman numeral of the convention, defaults to the current one.")
+        parser.add_argument('--owner',
+            help="Username that owns rows with no 'owner' column.")
+        parser.add_argument('--skip-invalid', action='store_true',
+            help="Import the valid rows even when some rows have errors.")
+
+    def handle(self, *args, **options):
+        if options['convention']:
+            try:
+                convention = Convention.objects.get(
+                    roman_num=options['convention'])
+            except Convention.DoesNotExist:
+                raise CommandError("No convention '%s'." % options['convention'])
+        else:
+            convention = get_current_con()
+            if convention is None:
+                raise CommandError("There's no convention to import into.")
+
+        owner = None
+        if options['owner']:
+            try:
+                owner = User.objects.get(username=options['owner'])
+            except User.DoesNotExist:
+                raise CommandError("No user '%s'." % options['owner'])
+
+        with open(options['csv_file'], newline='', encoding='utf-8-sig') as f:
+            result = import_csv(options['kind'], f, convention, owner,
+                options['skip_invalid'])
+
+        for line, message in result.errors:
+            self.stderr.write("Line %d: %s" % (line, message))
+        if result.errors and not options['skip_invalid']:
+            raise CommandError("Nothing imported, fix the errors above or use "
+                "--skip-invalid.")
+        self.stdout.write("Imported %d %s into %s." % (result.created,
+            options['kind'], convention))
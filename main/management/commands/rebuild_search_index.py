@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Game, Pie
+from main.search import rebuild_index
+
+class Command(BaseCommand):
+    help = ("Rebuild the SQLite full-text search tables for games and pies. "
+        "(PostgreSQL keeps its search index up to date by itself.)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        for model in [Game, Pie]:
+            rebuild_index(model, options['database'])
+        self.stdout.write("Search index rebuilt.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.counters import recount_conventions
+
+class Command(BaseCommand):
+    help = ("Recompute every convention's game and pie counters from the "
+        "games and pies tables.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        recount_conventions(options['database'])
+        self.stdout.write("Convention counters recomputed.")
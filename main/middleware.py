@@ -0,0 +1,89 @@
+import cProfile
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import profiling, timing
+
+logger = logging.getLogger('main.timing')
+
+class ServerTimingMiddleware:
+    """
+    Time each request's queries, template rendering and total, and report
+    them in a Server-Timing header, a log line and the staff timings page.
+    Goes first in MIDDLEWARE so the total covers the other middleware too.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            timing.stop()
+
+        match = request.resolver_match
+        url_name = match.view_name if match else '<unresolved>'
+        timing.record(url_name, timings)
+        response['Server-Timing'] = timings.header()
+        logger.info("timing method=%s url_name=%s status=%d total_ms=%.1f "
+            "db_ms=%.1f queries=%d template_ms=%.1f", request.method,
+            url_name, response.status_code, timings.total_ms, timings.db_ms,
+            timings.queries, timings.template_ms)
+        return response
+
+class ProfilerMiddleware:
+    """
+    Profile a settings.PROFILE_SAMPLE_RATE fraction of requests with cProfile,
+    and sample the stacks of all others to keep those slower than
+    settings.PROFILE_SLOW_MS, limited to settings.PROFILE_URL_NAMES if set.
+    Both are off by default; see main/profiling.py.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() < settings.PROFILE_SAMPLE_RATE:
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            response = profile.runcall(self.get_response, request)
+            ms = (time.perf_counter() - start) * 1000
+            url_name = self.url_name(request)
+            if url_name is not None:
+                profiling.save_profile(profile, url_name, ms)
+            return response
+
+        if settings.PROFILE_SLOW_MS is None:
+            return self.get_response(request)
+
+        sampler = profiling.get_sampler()
+        thread_id = threading.get_ident()
+        sampler.watch(thread_id)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.unwatch(thread_id)
+        ms = (time.perf_counter() - start) * 1000
+        url_name = self.url_name(request)
+        if ms >= settings.PROFILE_SLOW_MS and url_name is not None and stacks:
+            profiling.save_stacks(stacks, url_name, ms)
+        return response
+
+    def url_name(self, request):
+        """The request's URL name, or None if it isn't one to profile."""
+        match = request.resolver_match
+        url_name = match.view_name if match else '<unresolved>'
+        if (settings.PROFILE_URL_NAMES is not None and
+                url_name not in settings.PROFILE_URL_NAMES):
+            return None
+        return url_name
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# The full-text search tables and indexes used by main/search.py. They are
+# database specific, so they're written by hand rather than generated.
+
+SEARCH_COLUMNS = {
+    'main_game': ['title', 'gamemaster', 'system', 'description'],
+    'main_pie': ['text', 'person_name'],
+}
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_COLUMNS.items():
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                "CREATE INDEX %s_search_idx ON %s USING GIN "
+                "(to_tsvector('english', %s))" % (table, table,
+                    " || ' ' || ".join('"%s"."%s"' % (table, column)
+                        for column in columns)))
+        elif vendor == 'sqlite':
+            schema_editor.execute(
+                'CREATE VIRTUAL TABLE %s_fts USING fts5(%s)'
+                % (table, ', '.join(columns)))
+            schema_editor.execute(
+                'INSERT INTO %s_fts (rowid, %s) SELECT id, %s FROM %s'
+                % (table, ', '.join(columns), ', '.join(columns), table))
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_COLUMNS:
+        if vendor == 'postgresql':
+            schema_editor.execute('DROP INDEX %s_search_idx' % table)
+        elif vendor == 'sqlite':
+            schema_editor.execute('DROP TABLE %s_fts' % table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_pie_person_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='convention',
+            index=models.Index(fields=['-start_date'], name='main_con_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['convention', 'suppress_from_display', '-date_added', '-id'], name='main_game_registry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pie',
+            index=models.Index(fields=['convention', '-date_added', '-id'], name='main_pie_registry_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+def count_registrations(apps, schema_editor):
+    """Fill in the new counters from the existing games and pies."""
+    Convention = apps.get_model('main', 'Convention')
+    Game = apps.get_model('main', 'Game')
+    Pie = apps.get_model('main', 'Pie')
+    db = schema_editor.connection.alias
+    for convention in Convention.objects.using(db).all():
+        games = Game.objects.using(db).filter(convention=convention)
+        convention.game_count = games.count()
+        convention.displayed_game_count = games.filter(
+            suppress_from_display=False).count()
+        convention.pie_count = Pie.objects.using(db).filter(
+            convention=convention).count()
+        convention.save()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_registry_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='convention',
+            name='displayed_game_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='convention',
+            name='game_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='convention',
+            name='pie_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_registrations, migrations.RunPython.noop),
+    ]
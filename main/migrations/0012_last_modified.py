@@ -0,0 +1,40 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:14
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def date_existing_rows(apps, schema_editor):
+    """Existing games and pies were last changed, as far as we know, when added."""
+    db = schema_editor.connection.alias
+    for model_name in ['Game', 'Pie']:
+        model = apps.get_model('main', model_name)
+        model.objects.using(db).update(last_modified=F('date_added'))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_convention_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='pie',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(date_existing_rows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['convention', 'last_modified', 'id'], name='main_game_changes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pie',
+            index=models.Index(fields=['convention', 'last_modified', 'id'], name='main_pie_changes_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_last_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConventionArchive',
+            fields=[
+                ('convention', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='main.Convention')),
+                ('html', models.TextField()),
+                ('etag', models.CharField(max_length=32)),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+                ('source_version', models.CharField(blank=True, max_length=100)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+from main.helpers import length_in_hours, player_range
+
+
+def parse_existing_games(apps, schema_editor):
+    """Parse the numbers of players and lengths already entered."""
+    db = schema_editor.connection.alias
+    Game = apps.get_model('main', 'Game')
+    # Entries repeat a lot ('4', '3-5'...), so one update per distinct pair.
+    pairs = Game.objects.using(db).values_list('num_players', 'length'
+        ).distinct()
+    for num_players, length in list(pairs):
+        min_players, max_players = player_range(num_players)
+        Game.objects.using(db).filter(num_players=num_players,
+            length=length).update(min_players=min_players,
+            max_players=max_players, length_hours=length_in_hours(length))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_convention_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='length_hours',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='max_players',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='min_players',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(parse_existing_games, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['convention', 'suppress_from_display', 'max_players', 'min_players'], name='main_game_players_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['convention', 'suppress_from_display', 'length_hours'], name='main_game_length_idx'),
+        ),
+    ]
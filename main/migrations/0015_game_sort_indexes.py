@@ -0,0 +1,21 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_game_number_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['convention', 'suppress_from_display', 'title', 'id'], name='main_game_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['convention', 'suppress_from_display', 'system', 'id'], name='main_game_system_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.0.13 on 2026-10-18 12:20
+
+from django.db import migrations
+
+
+def clear_archives(apps, schema_editor):
+    """Stored archives were whole pages; they now hold only the registries."""
+    db = schema_editor.connection.alias
+    apps.get_model('main', 'ConventionArchive').objects.using(db).delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_game_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_archives, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,8 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 import datetime
 
-from .helpers import get_num_with_ordinal, ordinal
+from .helpers import (get_num_with_ordinal, length_in_hours, ordinal,
+    player_range)
 
 class Convention(models.Model):
     """Data model for representing a specific PieCon convention e.g. year."""
@@ -12,10 +13,37 @@ class Convention(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    # Kept up to date by the signal handlers in signals.py (see counters.py),
+    # so that pages can show them without counting rows.
+    game_count = models.PositiveIntegerField(default=0, editable=False)
+    displayed_game_count = models.PositiveIntegerField(default=0,
+        editable=False)
+    pie_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # For finding the current convention, see caching.py.
+            models.Index(fields=['-start_date'], name='main_con_start_date_idx'),
+        ]
+
+    COUNTER_FIELDS = ['game_count', 'displayed_game_count', 'pie_count']
+
     def __str__(self):
         """Return a string representation of the model."""
         return "PieCon " + self.roman_num
 
+    def save(self, *args, **kwargs):
+        """
+        Save the convention. Unless asked for explicitly, the counters aren't
+        written back, since they may have moved on since this copy was loaded.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS]
+        super().save(*args, **kwargs)
+
     def description(self):
         """
         Return a description with the tagline, like:
@@ -55,7 +83,31 @@ class Convention(models.Model):
         timerange = start + " - " + end + ", " + year
         return timerange
 
-class Pie(models.Model):
+class LoadedValuesMixin:
+    """
+    Remembers the field values a row had when it was loaded from the database,
+    so that signal handlers can tell what changed in a save.
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, attname):
+        """
+        Return the value 'attname' had when loaded (or last saved), or None for
+        a new object.
+        """
+        return getattr(self, '_loaded_values', {}).get(attname)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {f.attname: getattr(self, f.attname)
+            for f in self._meta.concrete_fields
+            if f.attname in self.__dict__}
+
+class Pie(LoadedValuesMixin, models.Model):
     """Data model for Pies/Snacks"""
     text = models.CharField(max_length=200)
     date_added = models.DateTimeField()
@@ -63,12 +115,23 @@ class Pie(models.Model):
     person_name = models.CharField(max_length=200)
     convention = models.ForeignKey(Convention, on_delete=models.SET_NULL,
         blank=True, null=True)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # For the pie registry: one convention, newest first.
+            models.Index(fields=['convention', '-date_added', '-id'],
+                name='main_pie_registry_idx'),
+            # For the change feed: one convention, oldest change first.
+            models.Index(fields=['convention', 'last_modified', 'id'],
+                name='main_pie_changes_idx'),
+        ]
 
     def __str__(self):
         """Return a string representation of the model."""
         return self.text
 
-class Game(models.Model):
+class Game(LoadedValuesMixin, models.Model):
     """Data model for Games."""
     title = models.CharField(max_length=200)
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -81,13 +144,55 @@ class Game(models.Model):
     suppress_from_display = models.BooleanField(default=False)
     convention = models.ForeignKey(Convention, on_delete=models.SET_NULL,
         blank=True, null=True)
+    last_modified = models.DateTimeField(auto_now=True)
+    # num_players and length as numbers, for filtering the registry. Filled in
+    # by save() (and set_number_fields() before a bulk_create()), None when
+    # the text has no number.
+    min_players = models.PositiveSmallIntegerField(blank=True, null=True,
+        editable=False)
+    max_players = models.PositiveSmallIntegerField(blank=True, null=True,
+        editable=False)
+    length_hours = models.PositiveSmallIntegerField(blank=True, null=True,
+        editable=False)
+
+    class Meta:
+        indexes = [
+            # For the game registry: one convention's displayed games, newest
+            # first.
+            models.Index(fields=['convention', 'suppress_from_display',
+                '-date_added', '-id'], name='main_game_registry_idx'),
+            # For the change feed: one convention, oldest change first.
+            models.Index(fields=['convention', 'last_modified', 'id'],
+                name='main_game_changes_idx'),
+            # For filtering the game registry by players and by length.
+            models.Index(fields=['convention', 'suppress_from_display',
+                'max_players', 'min_players'], name='main_game_players_idx'),
+            models.Index(fields=['convention', 'suppress_from_display',
+                'length_hours'], name='main_game_length_idx'),
+            # For the registry's other sorts, and the system facet.
+            models.Index(fields=['convention', 'suppress_from_display',
+                'title', 'id'], name='main_game_title_idx'),
+            models.Index(fields=['convention', 'suppress_from_display',
+                'system', 'id'], name='main_game_system_idx'),
+        ]
+
+    def set_number_fields(self):
+        """Fill in min_players, max_players and length_hours from the text."""
+        self.min_players, self.max_players = player_range(self.num_players)
+        self.length_hours = length_in_hours(self.length)
+
+    def save(self, *args, **kwargs):
+        self.set_number_fields()
+        super().save(*args, **kwargs)
 
     # Is just so the Game list on the admin site can easily show if a game will
     # show up on the site or not.
     def is_displayed(self):
-        current_con = Convention.objects.latest('start_date')
+        from .caching import get_current_con
+        current_con = get_current_con()
 
-        return ((self.convention == current_con) and
+        return ((current_con is not None) and
+            (self.convention_id == current_con.pk) and
             (self.suppress_from_display == False))
 
     is_displayed.admin_order_field = 'date_added'
@@ -97,3 +202,20 @@ class Game(models.Model):
     def __str__(self):
         """Return a string representation of the model."""
         return self.title
+
+class ConventionArchive(models.Model):
+    """
+    A past convention's games and pies, rendered to HTML once for its archive
+    page and thrown away when any of them change (see archive.py).
+    """
+    convention = models.OneToOneField(Convention, on_delete=models.CASCADE,
+        primary_key=True, related_name='archive')
+    html = models.TextField()
+    etag = models.CharField(max_length=32)
+    rendered_at = models.DateTimeField(auto_now=True)
+    # settings.ETAG_SALT when rendered, since the page links to static files
+    # that change with each deploy.
+    source_version = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return "Archive of %s" % self.convention
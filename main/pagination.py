@@ -0,0 +1,137 @@
+"""
+Keyset (cursor) pagination for the registry pages.
+
+Rather than an OFFSET, each page remembers the sort value and id of the last
+row it showed, and the next page starts from there. That way page 20 costs the
+same single indexed query as page 1.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+MIN_PK, MAX_PK = -2 ** 63, 2 ** 63 - 1
+
+def encode_cursor(value, pk):
+    """Turn a (sort value, id) pair into an opaque, URL-safe cursor."""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    data = json.dumps([value, pk]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def decode_cursor(cursor, field):
+    """
+    Turn a cursor back into a (sort value, id) pair, using the model 'field'
+    to convert the sort value. Raises ValueError for a malformed cursor.
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        value, pk = json.loads(
+            base64.urlsafe_b64decode(cursor + padding).decode())
+        value, pk = field.to_python(value), int(pk)
+    except (binascii.Error, TypeError, ValidationError, OverflowError,
+            UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor: %s" % e)
+    # Ids are 64-bit at most, and the database won't take a bigger number.
+    if not MIN_PK <= pk <= MAX_PK:
+        raise ValueError("Invalid cursor: id out of range.")
+    return value, pk
+
+class KeysetPage:
+    """
+    One page of 'queryset', newest (highest) first by 'field' and then by id,
+    or lowest first if not 'descending', starting after 'cursor' (or at the top
+    if cursor is None). The rows aren't fetched until the page is first used.
+    """
+    def __init__(self, queryset, cursor, page_size, field='date_added',
+            descending=True):
+        self.queryset = queryset
+        self.cursor = cursor
+        self.page_size = page_size
+        self.field = field
+
+        model_field = queryset.model._meta.get_field(field)
+        if descending:
+            self.page_queryset = queryset.order_by('-' + field, '-pk')
+            after = '__lt'
+        else:
+            self.page_queryset = queryset.order_by(field, 'pk')
+            after = '__gt'
+        if cursor:
+            value, pk = decode_cursor(cursor, model_field)
+            self.page_queryset = self.page_queryset.filter(
+                Q(**{field + after: value}) | Q(**{field: value, 'pk' + after: pk}))
+
+    @cached_property
+    def _rows(self):
+        # Fetch one extra row to find out whether there's a next page.
+        return list(self.page_queryset[:self.page_size + 1])
+
+    @property
+    def object_list(self):
+        return self._rows[:self.page_size]
+
+    @property
+    def has_next(self):
+        return len(self._rows) > self.page_size
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(getattr(last, self.field), last.pk)
+
+    @cached_property
+    def total(self):
+        """Number of rows across all pages."""
+        return self.queryset.count()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        # Templates try item lookups before attributes, so don't fetch the
+        # rows just to be asked for e.g. page['has_next'].
+        if not isinstance(index, (int, slice)):
+            raise TypeError("Page indices must be integers or slices.")
+        return self.object_list[index]
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin that pages the queryset with a KeysetPage. The cursor comes
+    from the 'after' query parameter, and visitors may pick a 'page_size' up
+    to settings.REGISTRY_MAX_PAGE_SIZE.
+    """
+    cursor_kwarg = 'after'
+    page_size_kwarg = 'page_size'
+    keyset_field = 'date_added'
+    keyset_descending = True
+
+    def get_keyset_order(self):
+        """The field the pages are sorted by, and whether highest first."""
+        return self.keyset_field, self.keyset_descending
+
+    def get_paginate_by(self, queryset):
+        try:
+            page_size = int(self.request.GET[self.page_size_kwarg])
+        except (KeyError, ValueError):
+            return settings.REGISTRY_PAGE_SIZE
+        return min(max(page_size, 1), settings.REGISTRY_MAX_PAGE_SIZE)
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        field, descending = self.get_keyset_order()
+        try:
+            page = KeysetPage(queryset, cursor, page_size, field, descending)
+        except ValueError as e:
+            raise Http404(str(e))
+        return (None, page, page, True)
@@ -0,0 +1,132 @@
+"""
+Opt-in profiling of production requests for the ProfilerMiddleware.
+
+A settings.PROFILE_SAMPLE_RATE fraction of requests are run under cProfile
+and saved as .prof files (for pstats or snakeviz). Requests that take longer
+than settings.PROFILE_SLOW_MS are caught by a stack sampler thread instead,
+which looks at the request's stack every settings.PROFILE_INTERVAL seconds,
+and saved as .folded files of "frame;frame;frame count" lines, ready for
+flamegraph.pl or speedscope. Only the newest settings.PROFILE_KEEP files are
+kept in settings.PROFILE_DIR.
+"""
+import os
+import re
+import sys
+import threading
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+
+FILE_RE = re.compile(
+    r'^(?P<stamp>\d{8}T\d{12})-(?P<url_name>[\w.-]+)-(?P<ms>\d+)ms'
+    r'\.(?P<kind>prof|folded)$')
+
+ProfileFile = namedtuple('ProfileFile',
+    ['name', 'created', 'url_name', 'ms', 'kind', 'size'])
+
+def collapse(frame):
+    """A frame's stack as a folded 'outermost;...;innermost' line."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append('%s (%s:%d)' % (code.co_name,
+            os.path.basename(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+class StackSampler(threading.Thread):
+    """
+    Background thread counting the stacks of the request threads it's been
+    told to watch.
+    """
+    def __init__(self, interval):
+        super().__init__(name='profiling-stack-sampler', daemon=True)
+        self.interval = interval
+        self.watched = {}
+        self.stopped = threading.Event()
+
+    def watch(self, thread_id):
+        self.watched[thread_id] = Counter()
+
+    def unwatch(self, thread_id):
+        return self.watched.pop(thread_id, Counter())
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if not self.watched:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in list(self.watched.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[collapse(frame)] += 1
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+def get_sampler():
+    """The process's stack sampler, started the first time it's needed."""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StackSampler(settings.PROFILE_INTERVAL)
+                _sampler.start()
+    return _sampler
+
+def _path(url_name, ms, kind):
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    url_name = re.sub(r'[^\w.-]', '.', url_name)
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    return os.path.join(settings.PROFILE_DIR,
+        '%s-%s-%dms.%s' % (stamp, url_name, ms, kind))
+
+def save_profile(profile, url_name, ms):
+    """Save a cProfile.Profile as a .prof file."""
+    path = _path(url_name, ms, 'prof')
+    profile.dump_stats(path)
+    prune()
+    return path
+
+def save_stacks(stacks, url_name, ms):
+    """Save a Counter of folded stacks as a .folded file."""
+    path = _path(url_name, ms, 'folded')
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write('%s %d\n' % (stack, count))
+    prune()
+    return path
+
+def list_files():
+    """The saved profiles, newest first."""
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    files = []
+    for name in names:
+        match = FILE_RE.match(name)
+        if match is None:
+            continue
+        path = os.path.join(settings.PROFILE_DIR, name)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            continue
+        created = timezone.make_aware(timezone.datetime.strptime(
+            match.group('stamp'), '%Y%m%dT%H%M%S%f'), timezone.utc)
+        files.append(ProfileFile(name, created, match.group('url_name'),
+            int(match.group('ms')), match.group('kind'), size))
+    return sorted(files, reverse=True)
+
+def prune():
+    """Delete all but the newest settings.PROFILE_KEEP profiles."""
+    for old in list_files()[settings.PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, old.name))
+        except FileNotFoundError:
+            pass
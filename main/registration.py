@@ -0,0 +1,104 @@
+"""
+Registering several games or pies in one request, from the new_games and
+new_pies formset pages or the JSON API, and the bulk insert shared with the
+CSV import in importing.py.
+
+A batch is validated as a whole and inserted with a single bulk_create()
+inside one transaction. bulk_create() skips the signal handlers, so
+bulk_register() brings the search index, convention counters, registry
+cache and archive pages up to date itself, once per batch.
+"""
+from django import forms
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .archive import invalidate_archive
+from .caching import bump_registry_version
+from .counters import adjust_counts
+from .forms import GameForm, PieForm
+from .models import Game
+from .search import index_objects
+
+BATCH_SIZE = 500
+
+def get_formset_class(kind, extra=0):
+    """
+    The formset class for 'kind', 'games' or 'pies': one required form plus
+    'extra' optional ones, up to settings.REGISTRATION_BATCH_MAX in all.
+    """
+    form_class = {'games': GameForm, 'pies': PieForm}[kind]
+    return forms.formset_factory(form_class, extra=extra, min_num=1,
+        validate_min=True, max_num=settings.REGISTRATION_BATCH_MAX,
+        validate_max=True)
+
+def formset_data(items, prefix='form'):
+    """
+    Turn a list of dicts of field values (e.g. from JSON) into the POST data
+    a formset expects.
+    """
+    data = {
+        '%s-TOTAL_FORMS' % prefix: str(len(items)),
+        '%s-INITIAL_FORMS' % prefix: '0',
+    }
+    for index, item in enumerate(items):
+        for field, value in item.items():
+            data['%s-%d-%s' % (prefix, index, field)] = value
+    return data
+
+def _read_back_ids(model, objects, using):
+    """
+    Set the ids of 'objects' just inserted by bulk_create(), which doesn't
+    hand them back on SQLite. Until the transaction ends nothing else can
+    insert, and ids only go up (AUTOINCREMENT), so the newest rows are these,
+    in order.
+    """
+    pks = list(model.objects.using(using).order_by('-pk').values_list(
+        'pk', flat=True)[:len(objects)])
+    for obj, pk in zip(objects, reversed(pks)):
+        obj.pk = pk
+
+def bulk_register(model, objects, convention, using='default'):
+    """
+    Insert new, unsaved 'objects' of 'model' belonging to 'convention' in one
+    transaction, and update everything their save() signals would have.
+    """
+    if model is Game:
+        # bulk_create() doesn't call save().
+        for game in objects:
+            game.set_number_fields()
+    with transaction.atomic(using=using):
+        model.objects.using(using).bulk_create(objects, batch_size=BATCH_SIZE)
+        if not all(obj.pk for obj in objects):
+            _read_back_ids(model, objects, using)
+        index_objects(model, objects, using)
+
+        convention_id = convention.pk if convention else None
+        if model is Game:
+            adjust_counts(convention_id, games=len(objects),
+                displayed_games=sum(not obj.suppress_from_display
+                    for obj in objects), using=using)
+        else:
+            adjust_counts(convention_id, pies=len(objects), using=using)
+        invalidate_archive(convention_id, using)
+    bump_registry_version(model, convention_id)
+
+def save_formset(formset, owner, convention, using='default'):
+    """
+    Register the filled in forms of a valid formset for 'owner' in
+    'convention'. Returns the new objects.
+    """
+    now = timezone.now()
+    objects = []
+    for form in formset.forms:
+        # Extra forms left blank are allowed and skipped.
+        if not form.has_changed():
+            continue
+        obj = form.save(commit=False)
+        obj.owner = owner
+        obj.date_added = now
+        obj.convention = convention
+        objects.append(obj)
+    if objects:
+        bulk_register(formset.form._meta.model, objects, convention, using)
+    return objects
@@ -0,0 +1,69 @@
+"""
+Fast rendering of the registry rows, which is most of the work on the games
+and pies pages once there are a few hundred of them.
+
+The row templates (main/game_rows.html and main/pie_rows.html) don't reverse
+a URL per row, they're given each edit URL split around the object id,
+reversed once per page. If Jinja2 is installed they're rendered from
+main/jinja2/ with it instead of the Django template engine (see
+settings.REGISTRY_ROWS_ENGINE).
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.template import engines
+from django.template.defaultfilters import linebreaks_filter
+from django.urls import reverse
+
+# Never a real primary key, so it can be found again in the reversed URL.
+URL_SENTINEL = 2147483647
+
+UrlTemplate = namedtuple('UrlTemplate', ['prefix', 'suffix'])
+
+def url_template(viewname):
+    """
+    Reverse a URL that takes a single id once, as a (prefix, suffix) pair to
+    go either side of each id, e.g. ('/games/', '/edit_game/').
+    """
+    url = reverse(viewname, args=[URL_SENTINEL])
+    return UrlTemplate(*url.split(str(URL_SENTINEL), 1))
+
+class RegistryRows:
+    """
+    The rendered rows for a list of games or pies. Rendering waits until
+    the rows are output in the page, so it's skipped for cached fragments.
+    'engine' is the alias of the template engine to use, which defaults to
+    settings.REGISTRY_ROWS_ENGINE.
+    """
+    def __init__(self, template_name, objects, edit_url, engine=None):
+        self.template_name = template_name
+        self.objects = objects
+        self.edit_url = edit_url
+        self.engine = engine
+
+    def render(self):
+        engine = engines[self.engine or settings.REGISTRY_ROWS_ENGINE]
+        template = engine.get_template(self.template_name)
+        return template.render({'rows': self.objects,
+            'edit_url': url_template(self.edit_url)})
+
+    def __bool__(self):
+        return bool(self.objects)
+
+    def __html__(self):
+        return self.render()
+
+    __str__ = __html__
+
+def game_rows(games):
+    return RegistryRows('main/game_rows.html', games, 'main:edit_game')
+
+def pie_rows(pies):
+    return RegistryRows('main/pie_rows.html', pies, 'main:edit_pie')
+
+def jinja2_environment(**options):
+    """The Jinja2 environment, with the Django filters the rows use."""
+    from jinja2 import Environment
+    env = Environment(**options)
+    env.filters['linebreaks'] = linebreaks_filter
+    return env
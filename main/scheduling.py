@@ -0,0 +1,177 @@
+"""
+Fits the current convention's games into a schedule of hour slots and tables.
+
+Each convention day runs from settings.SCHEDULE_DAY_START to
+settings.SCHEDULE_DAY_END (hours), and settings.SCHEDULE_TABLE_SEATS gives the
+seats at each table. A game needs a table with a seat for each player for
+'length' consecutive hours on one day, and none of its gamemasters may be
+running another game at the same time.
+
+The solver is greedy: the longest, biggest games are placed first, each at
+the earliest start with a free table (the smallest one that fits) and free
+gamemasters. Busy hours are kept as bitmasks per table and per gamemaster per
+day, so checking a placement is a couple of integer ANDs and hundreds of games
+schedule in milliseconds. Games that don't fit anywhere are listed as
+unscheduled with the reason.
+"""
+import datetime
+import re
+from collections import defaultdict
+
+from django.conf import settings
+
+from .helpers import length_in_hours, player_range
+
+# Gamemaster lists like "Alice & Bob", "Alice, Bob and Carol" or "Alice/Bob".
+GM_SEPARATORS = re.compile(r'\s*(?:,|&|/|\+|\band\b)\s*', re.IGNORECASE)
+
+def parse_hours(length, default=4):
+    """A game's length in whole hours, e.g. '3', '2.5' or '4h'."""
+    hours = length_in_hours(length)
+    return default if hours is None else hours
+
+def parse_players(num_players):
+    """The most players a game takes, e.g. 5 for '5' or '3-5' (0 if unknown)."""
+    return player_range(num_players)[1] or 0
+
+def parse_gamemasters(gamemaster):
+    """The set of (lower cased) gamemaster names in a gamemaster field."""
+    return {name.strip().lower() for name in GM_SEPARATORS.split(
+        gamemaster or '') if name.strip()}
+
+def convention_days(convention):
+    """Each date of the convention."""
+    start, end = convention.start_date, convention.end_date
+    if isinstance(start, datetime.datetime):
+        start, end = start.date(), end.date()
+    return [start + datetime.timedelta(days=n)
+        for n in range((end - start).days + 1)]
+
+class Placement:
+    """A game placed on a day, from a start hour, at a table."""
+    def __init__(self, game, day, start, hours, table):
+        self.game = game
+        self.day = day
+        self.start = start
+        self.hours = hours
+        self.table = table
+
+    @property
+    def end(self):
+        return self.start + self.hours
+
+class Schedule:
+    """
+    The result of schedule_games(): 'placements' and 'unscheduled' (a list of
+    (game, reason) pairs), plus the grid for the schedule page.
+    """
+    def __init__(self, days, hours, tables, placements, unscheduled):
+        self.days = days
+        self.hours = hours
+        self.tables = tables
+        self.placements = placements
+        self.unscheduled = unscheduled
+
+    def grid(self):
+        """
+        Per day, a row per hour of (hour, cells), with a cell per table that
+        isn't covered by a game started earlier: (placement, rowspan) for a
+        game starting at that hour, or (None, 1) for a free table.
+        """
+        starts = {(p.day, p.start, p.table): p for p in self.placements}
+        days = []
+        for day in self.days:
+            covered = set()
+            rows = []
+            for hour in self.hours:
+                cells = []
+                for table in range(len(self.tables)):
+                    if (hour, table) in covered:
+                        continue
+                    placement = starts.get((day, hour, table))
+                    if placement is None:
+                        cells.append((None, 1))
+                        continue
+                    cells.append((placement, placement.hours))
+                    covered.update((h, table)
+                        for h in range(hour + 1, placement.end))
+                rows.append((hour, cells))
+            days.append((day, rows))
+        return days
+
+def schedule_games(games, days, day_start=None, day_end=None,
+        table_seats=None):
+    """
+    Place 'games' (Game objects) on 'days' (a list of dates) between the
+    hours 'day_start' and 'day_end' at tables with 'table_seats' seats each,
+    defaulting to the SCHEDULE_* settings. Returns a Schedule.
+    """
+    day_start = settings.SCHEDULE_DAY_START if day_start is None else day_start
+    day_end = settings.SCHEDULE_DAY_END if day_end is None else day_end
+    table_seats = list(settings.SCHEDULE_TABLE_SEATS
+        if table_seats is None else table_seats)
+    slots = day_end - day_start
+    # Try the smallest tables that fit first, to keep big tables free.
+    tables_by_size = sorted(range(len(table_seats)),
+        key=lambda table: (table_seats[table], table))
+
+    table_busy = [[0] * len(days) for _ in table_seats]
+    gm_busy = defaultdict(lambda: [0] * len(days))
+    placements = []
+    unscheduled = []
+
+    # Saved games have their numbers parsed already (see Game.save()).
+    wanted = [(game,
+        game.length_hours or parse_hours(game.length),
+        game.max_players or parse_players(game.num_players),
+        parse_gamemasters(game.gamemaster)) for game in games]
+    wanted.sort(key=lambda item: (-item[1], -item[2], item[0].pk or 0))
+
+    for game, hours, players, gamemasters in wanted:
+        if hours > slots:
+            unscheduled.append((game, "Longer than a convention day."))
+            continue
+        tables = [table for table in tables_by_size
+            if table_seats[table] >= players]
+        if not tables:
+            unscheduled.append((game, "More players than any table seats."))
+            continue
+
+        placement = None
+        for day in range(len(days)):
+            gm_day = 0
+            for gm in gamemasters:
+                gm_day |= gm_busy[gm][day]
+            for start in range(slots - hours + 1):
+                mask = ((1 << hours) - 1) << start
+                if gm_day & mask:
+                    continue
+                for table in tables:
+                    if not table_busy[table][day] & mask:
+                        placement = (day, start, table, mask)
+                        break
+                if placement:
+                    break
+            if placement:
+                break
+
+        if placement is None:
+            unscheduled.append((game, "No free table and gamemaster time."))
+            continue
+        day, start, table, mask = placement
+        table_busy[table][day] |= mask
+        for gm in gamemasters:
+            gm_busy[gm][day] |= mask
+        placements.append(Placement(game, days[day], day_start + start, hours,
+            table))
+
+    tables = ['Table %d (%d seats)' % (n, seats)
+        for n, seats in enumerate(table_seats, start=1)]
+    return Schedule(days, list(range(day_start, day_end)), tables,
+        placements, unscheduled)
+
+def schedule_convention(convention):
+    """The schedule of a convention's displayed games."""
+    games = convention.game_set.filter(suppress_from_display=False).order_by(
+        'date_added', 'id')
+    return schedule_games(list(games), convention_days(convention))
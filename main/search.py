@@ -0,0 +1,129 @@
+"""
+Full-text search over games and pies.
+
+On PostgreSQL the searchable columns are covered by a GIN index on their
+to_tsvector(), which the database keeps up to date by itself. On SQLite each
+table has an FTS5 shadow table (main_game_fts, main_pie_fts) whose rowid is the
+game or pie id; the signal handlers in main/signals.py keep it in sync when a
+Game or Pie is saved or deleted, and code that bypasses save() (bulk_create(),
+update()) should call index_objects() itself. Other databases fall back to a
+plain icontains search.
+
+The tables and indexes are created by migration 0009_search_index.
+"""
+import re
+from functools import reduce
+import operator
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Game, Pie
+
+# The columns searched for each model, most important first.
+SEARCH_FIELDS = {
+    Game: ['title', 'gamemaster', 'system', 'description'],
+    Pie: ['text', 'person_name'],
+}
+
+# How much a match in each of the columns above counts for when ranking.
+FTS5_WEIGHTS = {
+    Game: [10.0, 5.0, 5.0, 1.0],
+    Pie: [5.0, 1.0],
+}
+
+def _fts_table(model):
+    return model._meta.db_table + '_fts'
+
+def _tsvector_sql(model):
+    """The expression the PostgreSQL GIN index is built on."""
+    table = model._meta.db_table
+    columns = " || ' ' || ".join('"%s"."%s"' % (table, field)
+        for field in SEARCH_FIELDS[model])
+    return "to_tsvector('english', %s)" % columns
+
+def _fts5_query(text):
+    """
+    Turn what a visitor typed into an FTS5 query that matches rows containing
+    every word (or a word starting with it), ignoring FTS5 query syntax.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join('"%s"*' % word for word in words)
+
+def search(queryset, text):
+    """
+    Narrow down a Game or Pie queryset to the rows matching 'text', with the
+    best matches first.
+    """
+    model = queryset.model
+    vendor = connections[queryset.db].vendor
+    if not re.search(r'\w', text):
+        return queryset.none()
+
+    if vendor == 'postgresql':
+        vector = _tsvector_sql(model)
+        return queryset.extra(
+            where=[vector + " @@ plainto_tsquery('english', %s)"],
+            params=[text],
+        ).annotate(search_rank=RawSQL(
+            "ts_rank(" + vector + ", plainto_tsquery('english', %s))",
+            [text])).order_by('-search_rank', '-pk')
+
+    if vendor == 'sqlite':
+        fts_table = _fts_table(model)
+        weights = ', '.join(str(weight) for weight in FTS5_WEIGHTS[model])
+        return queryset.extra(
+            tables=[fts_table],
+            where=[
+                '%s.rowid = %s.id' % (fts_table, model._meta.db_table),
+                fts_table + ' MATCH %s',
+            ],
+            params=[_fts5_query(text)],
+            # bm25() is lower for better matches.
+            select={'search_rank': 'bm25(%s, %s)' % (fts_table, weights)},
+            order_by=['search_rank', '-pk'],
+        )
+
+    words = re.findall(r'\w+', text)
+    return queryset.filter(reduce(operator.and_, [
+        reduce(operator.or_, [Q(**{field + '__icontains': word})
+            for field in SEARCH_FIELDS[model]])
+        for word in words]))
+
+def index_objects(model, objects, using='default'):
+    """Add or refresh 'objects' in the SQLite search index for 'model'."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not objects:
+        return
+    fields = SEARCH_FIELDS[model]
+    table = _fts_table(model)
+    rows = [[obj.pk] + [getattr(obj, field) for field in fields]
+        for obj in objects]
+    with connection.cursor() as cursor:
+        cursor.executemany('DELETE FROM %s WHERE rowid = %%s' % table,
+            [[row[0]] for row in rows])
+        cursor.executemany('INSERT INTO %s (rowid, %s) VALUES (%s)' % (
+            table, ', '.join(fields), ', '.join(['%s'] * (len(fields) + 1))),
+            rows)
+
+def unindex_objects(model, pks, using='default'):
+    """Remove the rows with the given ids from the SQLite search index."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not pks:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany('DELETE FROM %s WHERE rowid = %%s'
+            % _fts_table(model), [[pk] for pk in pks])
+
+def rebuild_index(model, using='default'):
+    """Rebuild the SQLite search index for 'model' from scratch."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    fields = ', '.join(SEARCH_FIELDS[model])
+    table = _fts_table(model)
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s' % table)
+        cursor.execute('INSERT INTO %s (rowid, %s) SELECT id, %s FROM %s' % (
+            table, fields, fields, model._meta.db_table))
@@ -0,0 +1,80 @@
+"""Signal handlers that keep the cached data in main/caching.py fresh."""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .archive import invalidate_archive
+from .caching import invalidate_current_con, bump_registry_version
+from .counters import adjust_counts
+from .models import Convention, Game, Pie
+from .search import index_objects, unindex_objects
+
+@receiver(post_save, sender=Convention)
+@receiver(post_delete, sender=Convention)
+def convention_changed(sender, instance, using, **kwargs):
+    """
+    Any added, edited or removed convention may change the current one, and
+    its archive page is out of date.
+    """
+    invalidate_current_con()
+    invalidate_archive(instance.pk, using, skip_current=False)
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+@receiver(post_save, sender=Pie)
+@receiver(post_delete, sender=Pie)
+def registration_changed(sender, instance, using, **kwargs):
+    """
+    A game or pie was added, edited or removed, so its registry (or archive
+    page) needs to be re-rendered. If it moved between conventions, both do.
+    """
+    convention_ids = {instance.convention_id,
+        instance.loaded_value('convention_id')}
+    for convention_id in convention_ids - {None}:
+        bump_registry_version(sender, convention_id)
+        invalidate_archive(convention_id, using)
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Pie)
+def update_search_index(sender, instance, using, **kwargs):
+    """Keep the SQLite full-text search table in step with saved rows."""
+    index_objects(sender, [instance], using)
+
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Pie)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    """Drop deleted rows from the SQLite full-text search table."""
+    unindex_objects(sender, [instance.pk], using)
+
+@receiver(post_save, sender=Game)
+def count_saved_game(sender, instance, created, using, **kwargs):
+    """Move the game's counts if it was added, moved or (un)suppressed."""
+    new = (instance.convention_id, instance.suppress_from_display)
+    if not created:
+        old = (instance.loaded_value('convention_id'),
+            instance.loaded_value('suppress_from_display'))
+        if old == new:
+            return
+        adjust_counts(old[0], games=-1, displayed_games=0 if old[1] else -1,
+            using=using)
+    adjust_counts(new[0], games=1, displayed_games=0 if new[1] else 1,
+        using=using)
+
+@receiver(post_delete, sender=Game)
+def count_deleted_game(sender, instance, using, **kwargs):
+    suppressed = instance.suppress_from_display
+    adjust_counts(instance.convention_id, games=-1,
+        displayed_games=0 if suppressed else -1, using=using)
+
+@receiver(post_save, sender=Pie)
+def count_saved_pie(sender, instance, created, using, **kwargs):
+    """Move the pie's count if it was added or moved."""
+    if not created:
+        old_convention_id = instance.loaded_value('convention_id')
+        if old_convention_id == instance.convention_id:
+            return
+        adjust_counts(old_convention_id, pies=-1, using=using)
+    adjust_counts(instance.convention_id, pies=1, using=using)
+
+@receiver(post_delete, sender=Pie)
+def count_deleted_pie(sender, instance, using, **kwargs):
+    adjust_counts(instance.convention_id, pies=-1, using=using)
@@ -6,4 +6,41 @@ $(function() {
 
   $('a.pop').popover();
 
+  // Append the next page of a registry in place instead of navigating to it.
+  $(document).on('click', 'a.load-more', function(e) {
+    e.preventDefault();
+    var link = $(this);
+    $.get(link.attr('href'), function(html) {
+      var page = $('<div>').html(html);
+      $('.registry-rows').append(page.find('.registry-rows').children());
+      link.replaceWith(page.find('a.load-more'));
+    });
+  });
+
+  // Keep a registry up to date by polling its change feed (long-polling, if
+  // the server allows it), patching changed rows in place and putting new
+  // ones at the top.
+  function followFeed(list, cursor) {
+    $.getJSON(list.data('feed'), {after: cursor, wait: 25}, function(data) {
+      $.each(data.rows, function(i, row) {
+        var existing = list.children('[data-id="' + row.id + '"]');
+        if (!row.displayed) {
+          existing.remove();
+        } else if (existing.length) {
+          existing.replaceWith(row.html);
+        } else {
+          list.prepend(row.html);
+        }
+      });
+      setTimeout(function() { followFeed(list, data.cursor || ''); },
+        (data.retry || 0) * 1000);
+    }).fail(function() {
+      setTimeout(function() { followFeed(list, cursor); }, 30000);
+    });
+  }
+
+  $('.registry-rows[data-feed]').first().each(function() {
+    followFeed($(this), $(this).data('cursor'));
+  });
+
 });
@@ -0,0 +1,20 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from main.assets import bundle_files
+
+register = template.Library()
+
+@register.simple_tag
+def asset_bundle(name):
+    """
+    Include a CSS or JavaScript bundle from settings.ASSET_BUNDLES, e.g.
+    {% asset_bundle 'main/dist/site.css' %}
+    """
+    urls = [(static(path),) for path in bundle_files(name)]
+    if name.endswith('.css'):
+        return format_html_join('\n',
+            '<link rel="stylesheet" type="text/css" href="{}"/>', urls)
+    return format_html_join('\n',
+        '<script type="text/javascript" src="{}"></script>', urls)
@@ -1,12 +1,45 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.template import Context, Engine
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Permission, User
 from django.contrib.auth import login
 from django.urls import reverse
 #from django.db import IntegrityError
-from datetime import timedelta
+from collections import Counter
+from datetime import date, timedelta
+from io import StringIO
+import base64
+import csv
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import shutil
+import tempfile
+from unittest import mock
 
-from .models import Pie, Game, Convention
+from . import assets, profiling, timing
+from .benchmarks import BASELINE_GAME_ROWS, measure, measure_rows, sample_games
+from .caching import get_current_con
+from .fake_data import generate
+from .forms import GameForm
+from .helpers import length_in_hours, player_range
+from .importing import import_csv
+from .models import Pie, Game, Convention, ConventionArchive
+from .pagination import encode_cursor
+from .rendering import game_rows, url_template
+from .scheduling import (parse_gamemasters, parse_hours, parse_players,
+    schedule_games)
+from .search import search
 
 def createConvention(roman_num='I', tagline="Tagline", days=0):
     """
@@ -64,11 +97,69 @@ def createGame(title='Test Game', gamemaster='GM', system='Game System',
         description=description, date_added=time)
     return game
 
+class QueryBudgetMixin:
+    """
+    Adds assertQueryBudget(), which fails when a request takes more than a
+    fixed number of queries. Unlike assertNumQueries() it doesn't pin the exact
+    count, so it can be reused as the views change, but it will still catch a
+    query that runs once per row.
+    """
+    def assertQueryBudget(self, budget, url, **extra):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), budget,
+            "%s took %d queries, budget is %d:\n%s" % (url, len(queries),
+                budget, '\n'.join(q['sql'] for q in queries.captured_queries)))
+        return response
+
 class ConventionModelTests(TestCase):
     def test_create_convention(self):
         new_convention = createConvention()
         self.assertEqual(new_convention.tagline, 'Tagline')
 
+class CurrentConventionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_no_convention(self):
+        """With no conventions at all, the resolver returns None."""
+        self.assertIsNone(get_current_con())
+        # The "no convention" state is cached too.
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_current_con())
+
+    def test_current_con_is_cached(self):
+        """After the first lookup, the current convention costs no queries."""
+        createConvention(roman_num='I', days=-365)
+        createConvention(roman_num='II', days=10)
+        self.assertEqual(get_current_con().roman_num, 'II')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_current_con().roman_num, 'II')
+
+    def test_saving_convention_clears_cache(self):
+        """Adding, editing and deleting a convention are picked up."""
+        createConvention(roman_num='I', days=-365)
+        self.assertEqual(get_current_con().roman_num, 'I')
+
+        new_con = createConvention(roman_num='II', days=10)
+        self.assertEqual(get_current_con().roman_num, 'II')
+
+        new_con.tagline = 'Edited'
+        new_con.save()
+        self.assertEqual(get_current_con().tagline, 'Edited')
+
+        new_con.delete()
+        self.assertEqual(get_current_con().roman_num, 'I')
+
+    def test_index_does_not_query_for_convention(self):
+        """Repeat visits to the home page don't look up the convention."""
+        createConvention(roman_num='II', days=10)
+        self.client.get(reverse('main:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('main:index'))
+        self.assertEqual(response.context['current_con'].roman_num, 'II')
+
 class GameModelTests(TestCase):
     def setUp(self):
         old_con = createConvention(roman_num='I', tagline="OldCon", days=-365)
@@ -227,6 +318,7 @@ class PieModelTests(TestCase):
 
 class PieListViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         old_con = createConvention(roman_num='I', tagline="OldCon", days=-365)
         current_con = createConvention(roman_num='II', tagline="NewCon", days=10)
 
@@ -309,3 +401,1641 @@ class ContentPagesTests(TestCase):
         response = self.client.get(reverse('users:login'))
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "<h2>Login to your account</h2>")
+
+class RegistryQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    The registry pages and the home page should take the same number of
+    queries no matter how many games and pies have been registered.
+    """
+    budget = 8
+
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def addRegistrations(self, count):
+        for i in range(count):
+            username = 'user%d' % i
+            game = createGame(title='Game %d' % i, username=username)
+            game.convention = self.current_con
+            game.save()
+            pie = createPie(text='Pie %d' % i, days=0, username=username)
+            pie.convention = self.current_con
+            pie.save()
+
+    def assertBudgetForAllPages(self):
+        for name in ['main:index', 'main:games', 'main:pies']:
+            self.assertQueryBudget(self.budget, reverse(name))
+
+    def test_budget_with_one_row(self):
+        """A nearly empty registry stays within the budget."""
+        self.addRegistrations(1)
+        self.assertBudgetForAllPages()
+
+    def test_budget_with_many_rows(self):
+        """A large registry stays within the same budget."""
+        self.addRegistrations(20)
+        self.assertBudgetForAllPages()
+
+    def test_budget_when_logged_in(self):
+        """Logged in users, who see edit buttons, stay within the budget."""
+        self.addRegistrations(20)
+        self.client.login(username='user0', password='12345')
+        self.assertBudgetForAllPages()
+        response = self.assertQueryBudget(self.budget, reverse('main:games'))
+        self.assertContains(response,
+            reverse('main:edit_game', kwargs={'game_id': Game.objects.get(
+                title='Game 0').id}))
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def createPies(self, count, days=0):
+        pies = []
+        for i in range(count):
+            pie = createPie(text='pie%d' % i, days=days)
+            pie.convention = self.current_con
+            pie.save()
+            pies.append(pie)
+        return pies
+
+    def test_walk_all_pages(self):
+        """Following the cursors visits every pie once, newest first."""
+        pies = [self.createPies(1, days=-i)[0] for i in range(5)]
+        seen = []
+        url = reverse('main:pies') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['pies']
+            self.assertLessEqual(len(page), 2)
+            seen.extend(page)
+            url = (reverse('main:pies') + '?page_size=2&after=' +
+                page.next_cursor if page.has_next else None)
+        self.assertEqual(seen, pies)
+
+    def test_rows_with_equal_dates(self):
+        """Rows added at the same moment are split across pages by id."""
+        pies = self.createPies(5)
+        Pie.objects.update(date_added=pies[0].date_added)
+        response = self.client.get(reverse('main:pies') + '?page_size=3')
+        page = response.context['pies']
+        self.assertEqual(len(page), 3)
+        self.assertTrue(page.has_next)
+        response = self.client.get(reverse('main:pies'),
+            {'page_size': 3, 'after': page.next_cursor})
+        next_page = response.context['pies']
+        self.assertEqual(len(next_page), 2)
+        self.assertFalse(next_page.has_next)
+        self.assertEqual(sorted(p.id for p in list(page) + list(next_page)),
+            sorted(p.id for p in pies))
+
+    def test_total_counts_all_pages(self):
+        """The registered count covers every page, not just the first."""
+        self.createPies(3)
+        response = self.client.get(reverse('main:pies') + '?page_size=1')
+        self.assertContains(response, "3 pies registered")
+        self.assertContains(response, "Load more pies")
+
+    def test_invalid_cursor(self):
+        """A malformed cursor is a 404, not a server error."""
+        response = self.client.get(reverse('main:games') + '?after=garbage')
+        self.assertEqual(response.status_code, 404)
+        for pk in ['1e999', '9223372036854775808']:
+            cursor = base64.urlsafe_b64encode(
+                ('["2020-01-01T00:00:00+00:00", %s]' % pk).encode()).decode()
+            response = self.client.get(reverse('main:games'),
+                {'after': cursor})
+            self.assertEqual(response.status_code, 404)
+
+    def test_page_size_is_clamped(self):
+        """Visitors can't ask for an unbounded page."""
+        self.createPies(3)
+        response = self.client.get(reverse('main:pies') + '?page_size=100000')
+        self.assertEqual(response.context['pies'].page_size, 200)
+        response = self.client.get(reverse('main:pies') + '?page_size=0')
+        self.assertEqual(response.context['pies'].page_size, 1)
+
+class RegistryFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old_con = createConvention(roman_num='I', days=-365)
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def createCurrentGame(self, title, username='testuser'):
+        game = createGame(title=title, username=username)
+        game.convention = self.current_con
+        game.save()
+        return game
+
+    def test_repeat_visit_served_from_cache(self):
+        """A second anonymous visit to the registries takes no queries."""
+        self.createCurrentGame('Cached game')
+        for name in ['main:games', 'main:pies']:
+            self.client.get(reverse(name))
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "No pies registered yet")
+
+    def test_new_game_shows_up(self):
+        """Adding a game makes the cached list stale."""
+        self.createCurrentGame('First game')
+        self.client.get(reverse('main:games'))
+        self.createCurrentGame('Second game')
+        response = self.client.get(reverse('main:games'))
+        self.assertContains(response, "Second game")
+        self.assertContains(response, "2 games registered")
+
+    def test_moved_and_suppressed_games_disappear(self):
+        """Moving a game to another convention or hiding it updates the list."""
+        game = self.createCurrentGame('Moving game')
+        hidden = self.createCurrentGame('Hidden game')
+        self.assertContains(self.client.get(reverse('main:games')),
+            "Moving game")
+
+        game = Game.objects.get(pk=game.pk)
+        game.convention = self.old_con
+        game.save()
+        hidden.suppress_from_display = True
+        hidden.save()
+        response = self.client.get(reverse('main:games'))
+        self.assertNotContains(response, "Moving game")
+        self.assertNotContains(response, "Hidden game")
+
+    def test_edit_links_shown_per_user(self):
+        """The shared fragment is personalized outside the cache."""
+        game = self.createCurrentGame('My game', username='owner')
+        other = createTestUser('other')
+        self.client.get(reverse('main:games'))
+
+        self.client.login(username='owner', password='12345')
+        response = self.client.get(reverse('main:games'))
+        self.assertContains(response,
+            '.edit-link.owner-%d { display: inline-block; }' % game.owner_id)
+
+        self.client.login(username='other', password='12345')
+        response = self.client.get(reverse('main:games'))
+        self.assertContains(response,
+            '.edit-link.owner-%d { display: inline-block; }' % other.id)
+        self.assertNotContains(response,
+            '.edit-link.owner-%d {' % game.owner_id)
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.current_con = createConvention(roman_num='II', days=10)
+        game = createGame(title='Exported, "quoted" game')
+        game.convention = self.current_con
+        game.save()
+        createPie(text='Exported pie', days=0)
+
+    def loginAsStaff(self):
+        staff = createTestUser('staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.login(username='staff', password='12345')
+
+    def test_export_is_staff_only(self):
+        """Logged out and non-staff users are sent to the admin login."""
+        url = reverse('main:export', kwargs={'name': 'games', 'format': 'csv'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        createTestUser('regular')
+        self.client.login(username='regular', password='12345')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv_export(self):
+        """The CSV export streams a header row and then one row per game."""
+        self.loginAsStaff()
+        response = self.client.get(reverse('main:export',
+            kwargs={'name': 'games', 'format': 'csv'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(
+            b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'convention_id', 'title'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], 'Exported, "quoted" game')
+        self.assertEqual(rows[1][4], 'testuser')
+
+    def test_ndjson_export_of_everything(self):
+        """The NDJSON export can cover every table in one stream."""
+        self.loginAsStaff()
+        response = self.client.get(reverse('main:export',
+            kwargs={'name': 'all', 'format': 'ndjson'}))
+        rows = [json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['model'] for row in rows],
+            ['conventions', 'games', 'pies'])
+        self.assertEqual(rows[2]['text'], 'Exported pie')
+
+    def test_unknown_exports(self):
+        """Unknown tables and CSV of every table are a 404."""
+        self.loginAsStaff()
+        for name, format in [('users', 'csv'), ('all', 'csv'),
+                ('games', 'xml')]:
+            response = self.client.get(reverse('main:export',
+                kwargs={'name': name, 'format': format}))
+            self.assertEqual(response.status_code, 404)
+
+    def test_export_command(self):
+        """The management command writes the same CSV."""
+        output = StringIO()
+        call_command('export_registry', 'pies', '--chunk-size=1',
+            stdout=output)
+        rows = list(csv.reader(output.getvalue().splitlines()))
+        self.assertEqual(rows[0][0], 'id')
+        self.assertEqual(rows[1][2], 'Exported pie')
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def createCurrentGame(self, **kwargs):
+        game = createGame(**kwargs)
+        game.convention = self.current_con
+        game.save()
+        return game
+
+    def test_ranked_results(self):
+        """A match in the title ranks above a match in the description."""
+        in_description = self.createCurrentGame(title='Heist',
+            description='A dragon sleeps on the gold.')
+        in_title = self.createCurrentGame(title='Dragon Hunt',
+            description='Hunt something big.')
+        self.createCurrentGame(title='Unrelated')
+        results = list(search(Game.objects.all(), 'dragon'))
+        self.assertEqual(results, [in_title, in_description])
+
+    def test_prefixes_and_punctuation(self):
+        """Partial words match, and query syntax is treated as plain text."""
+        game = self.createCurrentGame(system='Call of Cthulhu')
+        self.assertEqual(list(search(Game.objects.all(), 'cthul')), [game])
+        self.assertEqual(list(search(Game.objects.all(), '"cthulhu" ( call*')),
+            [game])
+        self.assertEqual(list(search(Game.objects.all(), '***')), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Edited and deleted games are kept up to date in the index."""
+        game = self.createCurrentGame(title='Old title')
+        game.title = 'New title'
+        game.save()
+        self.assertEqual(list(search(Game.objects.all(), 'old')), [])
+        self.assertEqual(list(search(Game.objects.all(), 'new')), [game])
+        game.delete()
+        self.assertEqual(list(search(Game.objects.all(), 'new')), [])
+
+    def test_search_page(self):
+        """The search page shows matching games and pies for this year only."""
+        self.createCurrentGame(title='Pie Heist')
+        hidden = self.createCurrentGame(title='Hidden Pie Game')
+        hidden.suppress_from_display = True
+        hidden.save()
+        pie = createPie(text='Apple pie', days=0)
+        pie.convention = self.current_con
+        pie.save()
+        createPie(text='Last year pie', days=-365)
+
+        response = self.client.get(reverse('main:search'), {'q': 'pie'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Pie Heist')
+        self.assertNotContains(response, 'Hidden Pie Game')
+        self.assertContains(response, 'Apple pie')
+        self.assertNotContains(response, 'Last year pie')
+
+    def test_admin_search(self):
+        """The admin changelist search box uses the index too."""
+        staff = createTestUser('staff')
+        staff.is_staff = True
+        staff.is_superuser = True
+        staff.save()
+        self.client.login(username='staff', password='12345')
+        createPie(text='Pecan pie', days=0)
+        createPie(text='Cheesecake', days=0)
+        response = self.client.get(reverse('admin:main_pie_changelist'),
+            {'q': 'pecan'})
+        self.assertContains(response, 'Pecan pie')
+        self.assertNotContains(response, 'Cheesecake')
+
+class QueryPlanTests(TestCase):
+    """
+    Check that SQLite's planner uses the composite indexes for the queries the
+    registries and the current convention lookup actually run, so that a model
+    change can't quietly drop one of them.
+    """
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def capturedQuery(self, url, table):
+        """Return the SQL of the query against 'table' run for 'url'."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'after': encode_cursor(timezone.now(), 1)})
+        return [q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT "%s"."id"' % table)
+            and 'ORDER BY "%s"."date_added" DESC' % table in q['sql']][0]
+
+    def assertUsesIndex(self, sql, index_name):
+        plan = self.explain(sql)
+        self.assertIn('USING INDEX ' + index_name, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_game_registry_plan(self):
+        sql = self.capturedQuery(reverse('main:games'), 'main_game')
+        self.assertUsesIndex(sql, 'main_game_registry_idx')
+
+    def test_pie_registry_plan(self):
+        sql = self.capturedQuery(reverse('main:pies'), 'main_pie')
+        self.assertUsesIndex(sql, 'main_pie_registry_idx')
+
+    def test_change_feed_plan(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('main:feed', args=['games']),
+                {'after': encode_cursor(timezone.now(), 1)})
+        self.assertUsesIndex(queries.captured_queries[-1]['sql'],
+            'main_game_changes_idx')
+
+    def test_game_filter_plan(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('main:games'), {'players': 4})
+        sql = [q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT "main_game"."id"')][0]
+        self.assertIn('USING INDEX main_game_players_idx', self.explain(sql))
+
+    def test_game_sort_plans(self):
+        for sort, index_name in [('title', 'main_game_title_idx'),
+                ('system', 'main_game_system_idx')]:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('main:games'), {'sort': sort,
+                    'after': encode_cursor('x', 1)})
+            sql = [q['sql'] for q in queries.captured_queries
+                if q['sql'].startswith('SELECT "main_game"."id"')][0]
+            self.assertUsesIndex(sql, index_name)
+
+    def test_current_convention_plan(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            get_current_con()
+        self.assertUsesIndex(queries.captured_queries[0]['sql'],
+            'main_con_start_date_idx')
+
+class AdminChangelistTests(QueryBudgetMixin, TestCase):
+    """The admin changelists take the same few queries for any page size."""
+    budget = 12
+
+    def setUp(self):
+        cache.clear()
+        self.old_con = createConvention(roman_num='I', days=-365)
+        self.current_con = createConvention(roman_num='II', days=10)
+        staff = createTestUser('staff')
+        staff.is_staff = True
+        staff.is_superuser = True
+        staff.save()
+        self.client.login(username='staff', password='12345')
+
+    def addRegistrations(self, count):
+        users = [createTestUser('user%d' % i) for i in range(count)]
+        for i, user in enumerate(users):
+            Game.objects.create(title='Game %d' % i, owner=user,
+                gamemaster='GM', system='System', num_players='4', length='4',
+                description='', date_added=timezone.now(),
+                convention=self.old_con if i % 2 else self.current_con)
+            Pie.objects.create(text='Pie %d' % i, owner=user,
+                person_name='Person', date_added=timezone.now(),
+                convention=self.current_con)
+
+    def assertBudgetForChangelists(self):
+        for name in ['admin:main_game_changelist', 'admin:main_pie_changelist',
+                'admin:main_convention_changelist']:
+            self.assertQueryBudget(self.budget, reverse(name))
+
+    def test_budget_with_few_rows(self):
+        self.addRegistrations(2)
+        self.assertBudgetForChangelists()
+
+    def test_budget_with_many_rows(self):
+        self.addRegistrations(20)
+        self.assertBudgetForChangelists()
+
+    def test_displayed_column(self):
+        """The 'Show on site?' column comes from the annotated queryset."""
+        self.addRegistrations(2)
+        response = self.client.get(reverse('admin:main_game_changelist'))
+        games = {game.title: game.displayed
+            for game in response.context['cl'].result_list}
+        self.assertEqual(games, {'Game 0': True, 'Game 1': False})
+        response = self.client.get(reverse('admin:main_game_changelist'),
+            {'o': '5'})
+        self.assertEqual(response.status_code, 200)
+
+class ConventionCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old_con = createConvention(roman_num='I', days=-365)
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def assertCounts(self, convention, games, displayed_games, pies):
+        convention.refresh_from_db()
+        self.assertEqual((convention.game_count,
+            convention.displayed_game_count, convention.pie_count),
+            (games, displayed_games, pies))
+
+    def test_counts_follow_games(self):
+        """Adding, suppressing, moving and deleting games update the counts."""
+        game = createGame()
+        game.convention = self.current_con
+        game.save()
+        createGame(title='Another').delete()
+        self.assertCounts(self.current_con, 1, 1, 0)
+
+        game.suppress_from_display = True
+        game.save()
+        self.assertCounts(self.current_con, 1, 0, 0)
+
+        game.convention = self.old_con
+        game.suppress_from_display = False
+        game.save()
+        self.assertCounts(self.current_con, 0, 0, 0)
+        self.assertCounts(self.old_con, 1, 1, 0)
+
+        # Saving without changes leaves the counts alone.
+        game.save()
+        self.assertCounts(self.old_con, 1, 1, 0)
+
+        game.delete()
+        self.assertCounts(self.old_con, 0, 0, 0)
+
+    def test_counts_follow_pies(self):
+        """Adding, moving and deleting pies update the counts."""
+        pie = createPie(text='pie', days=0)
+        pie.convention = self.current_con
+        pie.save()
+        self.assertCounts(self.current_con, 0, 0, 1)
+        pie.convention = self.old_con
+        pie.save()
+        self.assertCounts(self.current_con, 0, 0, 0)
+        self.assertCounts(self.old_con, 0, 0, 1)
+        pie.delete()
+        self.assertCounts(self.old_con, 0, 0, 0)
+
+    def test_editing_convention_keeps_counts(self):
+        """Saving a stale copy of a convention doesn't undo the counts."""
+        stale_con = Convention.objects.get(pk=self.current_con.pk)
+        pie = createPie(text='pie', days=0)
+        pie.convention = self.current_con
+        pie.save()
+        stale_con.tagline = 'Edited'
+        stale_con.save()
+        self.assertCounts(self.current_con, 0, 0, 1)
+        self.assertEqual(self.current_con.tagline, 'Edited')
+
+    def test_recount_command(self):
+        """The recount command fixes counts that drifted."""
+        game = createGame()
+        game.convention = self.current_con
+        game.save()
+        hidden = createGame(title='Hidden')
+        hidden.convention = self.current_con
+        hidden.suppress_from_display = True
+        hidden.save()
+        Convention.objects.update(game_count=10, displayed_game_count=10,
+            pie_count=10)
+        call_command('recount_conventions', stdout=StringIO())
+        self.assertCounts(self.current_con, 2, 1, 0)
+        self.assertCounts(self.old_con, 0, 0, 0)
+
+    def test_pages_do_not_count_rows(self):
+        """The home page and registries read the counters instead."""
+        game = createGame()
+        game.convention = self.current_con
+        game.save()
+        for name in ['main:index', 'main:games', 'main:pies']:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(name))
+            # Only the games' facets are counted, all in one grouped query.
+            grouped = [q for q in queries.captured_queries
+                if 'GROUP BY' in q['sql']]
+            self.assertLessEqual(len(grouped), 1 if name == 'main:games' else 0)
+            self.assertFalse([q for q in queries.captured_queries
+                if 'COUNT(' in q['sql'] and q not in grouped])
+        response = self.client.get(reverse('main:index'))
+        self.assertContains(response, '1 game</a>')
+        self.assertContains(response, '0 pies</a>')
+
+class FakeDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_command(self):
+        """The generator fills every table and keeps the derived data right."""
+        call_command('generate_fake_data', '--conventions=3', '--users=5',
+            '--games=40', '--pies=30', stdout=StringIO())
+        self.assertEqual(Convention.objects.count(), 3)
+        self.assertEqual(Game.objects.count(), 40)
+        self.assertEqual(Pie.objects.count(), 30)
+        self.assertEqual(sum(Convention.objects.values_list('game_count',
+            flat=True)), 40)
+        self.assertEqual(sum(Convention.objects.values_list('pie_count',
+            flat=True)), 30)
+        self.assertTrue(get_current_con().start_date > timezone.now().date())
+        title_word = Game.objects.first().title.split()[0]
+        self.assertTrue(search(Game.objects.all(), title_word).exists())
+
+    def test_benchmark_measure(self):
+        """measure() reports time, queries and size for a page."""
+        generate(conventions=1, users=2, games=5, pies=5)
+        result = measure(self.client, reverse('main:games'), repeat=2)
+        self.assertEqual(result['status'], 200)
+        self.assertGreater(result['bytes'], 0)
+        self.assertLessEqual(result['min_ms'], result['median_ms'])
+        self.assertEqual(measure(self.client, reverse('main:games'),
+            repeat=1)['queries'], 0)
+
+class ImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+        self.owner = createTestUser('owner')
+        self.owner.email = 'owner@example.com'
+        self.owner.save()
+
+    def gamesCsv(self, rows):
+        header = 'title,gamemaster,system,num_players,length,description,owner'
+        return StringIO('\n'.join([header] + rows) + '\n')
+
+    def test_import_games(self):
+        """Valid rows are added to the convention with their owners."""
+        csv_file = self.gamesCsv([
+            'Heist,Ann,Blades,3-5,4,A job,owner',
+            'Crypt,Bob,D&D,4,3,"Spooky, dark",owner@example.com',
+            'Tavern,Cy,Fate,5,2,Drinks,',
+        ])
+        result = import_csv('games', csv_file, self.current_con,
+            default_owner=createTestUser('staff'))
+        self.assertEqual((result.created, result.errors), (3, []))
+        self.assertEqual(Game.objects.get(title='Crypt').owner, self.owner)
+        self.assertEqual(Game.objects.get(title='Tavern').owner.username,
+            'staff')
+        self.current_con.refresh_from_db()
+        self.assertEqual(self.current_con.displayed_game_count, 3)
+        self.assertEqual(list(search(Game.objects.all(), 'spooky')),
+            [Game.objects.get(title='Crypt')])
+        response = self.client.get(reverse('main:games'))
+        self.assertContains(response, '3 games registered')
+
+    def test_invalid_rows_abort_the_import(self):
+        """Any bad row means nothing is imported, and the errors say why."""
+        csv_file = self.gamesCsv([
+            'Heist,Ann,Blades,3-5,4,A job,owner',
+            ',Bob,D&D,4,3,No title,owner',
+            'Tavern,Cy,Fate,5,2,Drinks,nobody',
+        ])
+        result = import_csv('games', csv_file, self.current_con)
+        self.assertEqual(result.created, 0)
+        self.assertEqual([line for line, message in result.errors], [3, 4])
+        self.assertIn("Unknown owner 'nobody'", result.errors[1][1])
+        self.assertFalse(Game.objects.exists())
+
+    def test_skip_invalid(self):
+        """With skip_invalid, the good rows go in anyway."""
+        csv_file = StringIO('person_name,text,owner\nAnn,Apple pie,owner\n'
+            'Bob,,owner\n')
+        result = import_csv('pies', csv_file, self.current_con,
+            skip_invalid=True)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(Pie.objects.get().text, 'Apple pie')
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Owners are looked up, and rows inserted, in batches."""
+        def queries_for(count):
+            rows = ['Game %d,GM,System,4,4,Description,owner' % i
+                for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                import_csv('games', self.gamesCsv(rows), self.current_con)
+            return len(queries)
+        self.assertEqual(queries_for(2), queries_for(50))
+
+    def test_admin_import(self):
+        """Staff can upload a CSV from the convention admin."""
+        self.owner.is_staff = True
+        self.owner.is_superuser = True
+        self.owner.save()
+        self.client.login(username='owner', password='12345')
+        response = self.client.post(reverse('admin:main_convention_changelist'),
+            {'action': 'import_registrations',
+             '_selected_action': [self.current_con.pk]})
+        url = reverse('admin:main_convention_import',
+            args=[self.current_con.pk])
+        self.assertRedirects(response, url)
+
+        upload = SimpleUploadedFile('pies.csv',
+            b'person_name,text\nAnn,Apple pie\nBob,Pecan pie\n')
+        response = self.client.post(url, {'kind': 'pies', 'csv_file': upload})
+        self.assertRedirects(response,
+            reverse('admin:main_convention_changelist'))
+        self.assertEqual(Pie.objects.filter(convention=self.current_con,
+            owner=self.owner).count(), 2)
+
+    def test_owner_email_ignores_case(self):
+        csv_file = self.gamesCsv(['Heist,Ann,Blades,3-5,4,A job,'
+            'Owner@Example.COM'])
+        result = import_csv('games', csv_file, self.current_con)
+        self.assertEqual((result.created, result.errors), (1, []))
+        self.assertEqual(Game.objects.get().owner, self.owner)
+
+    def test_admin_import_needs_add_permission(self):
+        self.owner.is_staff = True
+        self.owner.save()
+        self.owner.user_permissions.add(
+            Permission.objects.get(codename='change_convention'),
+            Permission.objects.get(codename='add_game'))
+        self.client.login(username='owner', password='12345')
+        url = reverse('admin:main_convention_import',
+            args=[self.current_con.pk])
+        upload = SimpleUploadedFile('pies.csv', b'person_name,text\nAnn,Pie\n')
+        response = self.client.post(url, {'kind': 'pies', 'csv_file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "permission to add pies")
+        self.assertFalse(Pie.objects.exists())
+
+    def test_admin_import_bad_files(self):
+        self.owner.is_staff = True
+        self.owner.is_superuser = True
+        self.owner.save()
+        self.client.login(username='owner', password='12345')
+        url = reverse('admin:main_convention_import',
+            args=[self.current_con.pk])
+        for content, message in [
+                (b'person_name,text\nAnn,Cr\xe8me pie\n', "UTF-8"),
+                (b'person_name,text\nAnn,Pie\x00\n', "valid CSV")]:
+            upload = SimpleUploadedFile('pies.csv', content)
+            response = self.client.post(url, {'kind': 'pies',
+                'csv_file': upload})
+            self.assertContains(response, message)
+        self.assertFalse(Pie.objects.exists())
+
+    def test_import_command(self):
+        """The management command reports errors and imports."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'games.csv')
+        with open(path, 'w') as f:
+            f.write(self.gamesCsv(['Heist,Ann,Blades,3-5,4,A job,']).getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_registrations', 'games', path,
+                stdout=StringIO(), stderr=StringIO())
+        call_command('import_registrations', 'games', path, '--owner=owner',
+            '--convention=II', stdout=StringIO())
+        self.assertEqual(Game.objects.get().convention, self.current_con)
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def assertNotModified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def test_repeat_visits_not_modified(self):
+        """Every public page answers a repeat visit with a 304."""
+        for name in ['main:index', 'main:games', 'main:pies', 'main:about',
+                'main:volunteer']:
+            self.assertNotModified(reverse(name))
+
+    def test_not_modified_costs_no_queries(self):
+        """Checking the ETag of a warm registry page takes no queries."""
+        etag = self.assertNotModified(reverse('main:games'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('main:games'),
+                HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_registration_changes_etag(self):
+        """A new game changes the games and home page ETags, not the pies'."""
+        etags = {name: self.assertNotModified(reverse(name))
+            for name in ['main:index', 'main:games', 'main:pies']}
+        game = createGame()
+        game.convention = self.current_con
+        game.save()
+        for name in ['main:index', 'main:games']:
+            response = self.client.get(reverse(name),
+                HTTP_IF_NONE_MATCH=etags[name])
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('main:pies'),
+            HTTP_IF_NONE_MATCH=etags['main:pies'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user_and_page(self):
+        """Logging in, or asking for another page, changes the ETag."""
+        anonymous = self.assertNotModified(reverse('main:games'))
+        second_page = self.client.get(reverse('main:games'),
+            {'page_size': 1})['ETag']
+        self.assertNotEqual(anonymous, second_page)
+        createTestUser('testuser')
+        self.client.login(username='testuser', password='12345')
+        response = self.client.get(reverse('main:games'),
+            HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+
+
+class AssetBundleTests(TestCase):
+    """Tests for the bundled, content hashed CSS and JavaScript."""
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+        self.original_root = assets.STATIC_ROOT
+        assets.STATIC_ROOT = self.static_root
+        assets._manifest = None
+
+    def tearDown(self):
+        assets.STATIC_ROOT = self.original_root
+        assets._manifest = None
+
+    def test_minify_css(self):
+        css = "/* comment */\nbody {\n    color: #444;\n    padding: 0;\n}\n"
+        self.assertEqual(assets.minify_css(css), "body{color:#444;padding:0}")
+
+    def test_minify_js_keeps_urls_in_strings(self):
+        js = "// comment\n\n    var url = 'http://example.com';\n"
+        self.assertEqual(assets.minify_js(js), "var url = 'http://example.com';")
+
+    def test_build_writes_hashed_files(self):
+        manifest = assets.build_all()
+        built = manifest['main/dist/site.css']
+        self.assertRegex(built, r'^main/dist/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.static_root, built)
+        self.assertTrue(os.path.exists(path))
+        # collectstatic compresses the files it serves.
+        self.assertFalse(os.path.exists(path + '.gz'))
+        # Building again with the same sources gives the same names.
+        self.assertEqual(assets.build_all(), manifest)
+
+    def test_pages_use_sources_until_built(self):
+        response = self.client.get(reverse('main:about'))
+        self.assertContains(response, 'main/style.css')
+        self.assertContains(response, 'main/script.js')
+
+    def test_pages_use_built_bundles(self):
+        manifest = assets.build_all()
+        assets._manifest = None
+        response = self.client.get(reverse('main:about'))
+        self.assertContains(response, manifest['main/dist/site.css'])
+        self.assertContains(response, manifest['main/dist/site.js'])
+        self.assertNotContains(response, 'main/style.css')
+
+    def test_pages_render_with_manifest_storage(self):
+        """Built, then collected (as bin/post_compile does), pages work."""
+        manifest = assets.build_all()
+        assets._manifest = None
+        collected = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, collected)
+        with self.settings(STATICFILES_DIRS=[self.static_root],
+                STATIC_ROOT=collected, STATICFILES_STORAGE='django.contrib.'
+                'staticfiles.storage.ManifestStaticFilesStorage'):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            response = self.client.get(reverse('main:about'))
+        self.assertEqual(response.status_code, 200)
+        root, ext = os.path.splitext(manifest['main/dist/site.css'])
+        self.assertRegex(response.content.decode(),
+            r'%s\.[0-9a-f]{12}%s' % (re.escape(root), ext))
+
+    @override_settings(DEBUG=True)
+    def test_debug_uses_sources(self):
+        assets.build_all()
+        assets._manifest = None
+        self.assertEqual(assets.bundle_files('main/dist/site.css'),
+            ['main/style.css'])
+
+
+class RegistryRowsTests(TestCase):
+    """Tests for the registry rows rendered without a {% url %} per row."""
+
+    def test_url_template(self):
+        prefix, suffix = url_template('main:edit_game')
+        self.assertEqual(prefix + '42' + suffix,
+            reverse('main:edit_game', kwargs={'game_id': 42}))
+
+    def test_rows_match_per_row_url_template(self):
+        """The rows come out the same as they did with {% url %}."""
+        games = sample_games(5)
+        baseline = Engine.get_default().from_string(BASELINE_GAME_ROWS)
+        self.assertHTMLEqual(str(game_rows(games)),
+            baseline.render(Context({'games': games})))
+
+    def test_rows_are_escaped(self):
+        game = sample_games(1)[0]
+        game.title = '<script>'
+        self.assertIn('&lt;script&gt;', str(game_rows([game])))
+
+    def test_measure_rows(self):
+        results = measure_rows(rows=10, repeat=1)
+        self.assertEqual(results['rows'], 10)
+        self.assertIn('baseline', results)
+        self.assertIn('django', results)
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def createCurrentGame(self, title):
+        game = createGame(title=title)
+        game.convention = self.current_con
+        game.save()
+        return game
+
+    def getFeed(self, name='games', **params):
+        response = self.client.get(reverse('main:feed', args=[name]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_page_cursor_skips_rows_already_shown(self):
+        """The registry page gives a cursor after the rows it shows."""
+        self.createCurrentGame('Shown game')
+        response = self.client.get(reverse('main:games'))
+        cursor = str(response.context['feed_cursor'])
+        self.assertContains(response, 'data-cursor="%s"' % cursor)
+        self.assertEqual(self.getFeed(after=cursor)['rows'], [])
+
+        new = self.createCurrentGame('New game')
+        data = self.getFeed(after=cursor)
+        self.assertEqual([row['id'] for row in data['rows']], [new.pk])
+        self.assertIn('New game', data['rows'][0]['html'])
+        self.assertIn('data-id="%d"' % new.pk, data['rows'][0]['html'])
+        self.assertEqual(self.getFeed(after=data['cursor'])['rows'], [])
+
+    def test_edited_and_hidden_rows(self):
+        game = self.createCurrentGame('Some game')
+        cursor = self.getFeed()['cursor']
+
+        game.title = 'Renamed game'
+        game.save()
+        data = self.getFeed(after=cursor)
+        self.assertEqual(len(data['rows']), 1)
+        self.assertTrue(data['rows'][0]['displayed'])
+        self.assertIn('Renamed game', data['rows'][0]['html'])
+
+        game.suppress_from_display = True
+        game.save()
+        data = self.getFeed(after=data['cursor'])
+        self.assertFalse(data['rows'][0]['displayed'])
+
+    def test_hidden_rows_have_no_content(self):
+        game = self.createCurrentGame('Secret game')
+        game.description = 'Secret description'
+        game.suppress_from_display = True
+        game.save()
+        response = self.client.get(reverse('main:feed', args=['games']))
+        self.assertEqual(response.json()['rows'],
+            [{'id': game.pk, 'displayed': False}])
+        self.assertNotContains(response, 'Secret')
+
+    def test_other_conventions_left_out(self):
+        old_con = createConvention(roman_num='I', days=-365)
+        pie = createPie(text='Old pie', days=0)
+        pie.convention = old_con
+        pie.save()
+        self.assertEqual(self.getFeed('pies')['rows'], [])
+
+    @override_settings(FEED_PAGE_SIZE=2)
+    def test_has_more(self):
+        for i in range(3):
+            self.createCurrentGame('Game %d' % i)
+        data = self.getFeed()
+        self.assertTrue(data['has_more'])
+        data = self.getFeed(after=data['cursor'])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(len(data['rows']), 1)
+
+    @override_settings(FEED_POLL_INTERVAL=0.01, FEED_MAX_WAIT=1)
+    def test_wait_without_changes(self):
+        """A long poll with nothing new returns empty once the wait is up."""
+        self.createCurrentGame('Some game')
+        cursor = self.getFeed()['cursor']
+        data = self.getFeed(after=cursor, wait='0.05')
+        self.assertEqual(data, {'cursor': cursor, 'has_more': False,
+            'retry': 15, 'rows': []})
+
+    @override_settings(FEED_POLL_INTERVAL=0.01, FEED_MAX_WAIT=1)
+    def test_wait_sees_changes_from_other_processes(self):
+        """Waiting checks the database, not this process's cache."""
+        game = self.createCurrentGame('Some game')
+        cursor = self.getFeed()['cursor']
+        real_sleep = time.sleep
+
+        def sleep(seconds):
+            # An edit that doesn't bump the version in this process's cache.
+            Game.objects.filter(pk=game.pk).update(title='Renamed game',
+                last_modified=timezone.now())
+            real_sleep(seconds)
+
+        with mock.patch('main.feed.time.sleep', sleep):
+            data = self.getFeed(after=cursor, wait='0.5')
+        self.assertEqual(data['retry'], 0)
+        self.assertIn('Renamed game', data['rows'][0]['html'])
+
+    @override_settings(FEED_MAX_WAIT=0)
+    def test_no_waiting_with_sync_workers(self):
+        """Sync workers can't be tied up, so requests don't wait."""
+        self.createCurrentGame('Some game')
+        cursor = self.getFeed()['cursor']
+        start = time.monotonic()
+        self.assertEqual(self.getFeed(after=cursor, wait='25')['rows'], [])
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(reverse('main:feed',
+            args=['conventions'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('main:feed', args=['games']),
+            {'after': 'not a cursor'}).status_code, 404)
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        timing.clear()
+        createConvention(roman_num='II', days=10)
+
+    def test_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('main:games'))
+        header = response['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[0-9.]+;desc="%d queries", '
+            r'tpl;dur=[0-9.]+, total;dur=[0-9.]+$' % len(queries))
+        self.assertNotIn('tpl;dur=0.0,', header)
+
+    def test_percentiles_per_url_name(self):
+        for _ in range(3):
+            self.client.get(reverse('main:games'))
+        self.client.get(reverse('main:about'))
+        self.client.get('/no-such-page/')
+        rows = {row['url_name']: row for row in timing.summary()}
+        self.assertEqual(rows['main:games']['count'], 3)
+        self.assertEqual(rows['main:about']['count'], 1)
+        self.assertEqual(rows['<unresolved>']['count'], 1)
+        games = rows['main:games']
+        self.assertLessEqual(games['p50'], games['p95'])
+        self.assertLessEqual(games['p95'], games['p99'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(timing.percentile(values, 0.50), 50)
+        self.assertEqual(timing.percentile(values, 0.95), 95)
+        self.assertEqual(timing.percentile(values, 0.99), 99)
+        self.assertEqual(timing.percentile([7], 0.99), 7)
+
+    def test_timings_page_for_staff_only(self):
+        url = reverse('admin_timings')
+        createTestUser('visitor')
+        self.client.login(username='visitor', password='12345')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = createTestUser('staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.login(username='staff', password='12345')
+        self.client.get(reverse('main:games'))
+        response = self.client.get(url)
+        self.assertContains(response, 'main:games')
+
+        self.client.post(url)
+        self.assertNotIn('main:games',
+            [row['url_name'] for row in timing.summary()])
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        createConvention(roman_num='II', days=10)
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        profile_settings = override_settings(PROFILE_DIR=self.profile_dir)
+        profile_settings.enable()
+        self.addCleanup(profile_settings.disable)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0)
+    def test_sampled_request_profiled(self):
+        self.client.get(reverse('main:games'))
+        files = profiling.list_files()
+        self.assertEqual([(f.url_name, f.kind) for f in files],
+            [('main.games', 'prof')])
+        stats = pstats.Stats(os.path.join(self.profile_dir, files[0].name))
+        self.assertTrue(stats.total_calls)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0, PROFILE_URL_NAMES=['main:pies'])
+    def test_only_listed_url_names(self):
+        self.client.get(reverse('main:games'))
+        self.assertEqual(profiling.list_files(), [])
+        self.client.get(reverse('main:pies'))
+        self.assertEqual(len(profiling.list_files()), 1)
+
+    def test_off_by_default(self):
+        self.client.get(reverse('main:games'))
+        self.assertEqual(profiling.list_files(), [])
+
+    def test_stack_sampler(self):
+        sampler = profiling.StackSampler(0.001)
+        sampler.start()
+        self.addCleanup(sampler.stop)
+        sampler.watch(threading.get_ident())
+        time.sleep(0.05)
+        stacks = sampler.unwatch(threading.get_ident())
+        self.assertTrue(any('test_stack_sampler' in stack for stack in stacks))
+
+    def test_folded_stacks(self):
+        def inner():
+            return profiling.collapse(sys._getframe())
+        stack = inner()
+        self.assertTrue(stack.endswith(';inner (tests.py:%d)'
+            % inner.__code__.co_firstlineno))
+        profiling.save_stacks(Counter({stack: 3}), 'main:games', 250)
+        saved = profiling.list_files()[0]
+        self.assertEqual((saved.url_name, saved.ms, saved.kind),
+            ('main.games', 250, 'folded'))
+        with open(os.path.join(self.profile_dir, saved.name)) as f:
+            self.assertEqual(f.read(), '%s 3\n' % stack)
+
+    @override_settings(PROFILE_KEEP=2)
+    def test_ring_buffer(self):
+        for ms in [100, 200, 300]:
+            profiling.save_stacks(Counter({'a;b': 1}), 'main:games',
+                ms)
+        self.assertEqual([f.ms for f in profiling.list_files()], [300, 200])
+
+    def test_staff_view(self):
+        profiling.save_stacks(Counter({'a;b': 1}), 'main:games', 100)
+        name = profiling.list_files()[0].name
+        staff = createTestUser('staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.login(username='staff', password='12345')
+        response = self.client.get(reverse('admin_profiles'))
+        self.assertContains(response, reverse('admin_profile_download',
+            args=[name]))
+        response = self.client.get(reverse('admin_profile_download',
+            args=[name]))
+        self.assertEqual(b''.join(response.streaming_content), b'a;b 1\n')
+        response = self.client.get(reverse('admin_profile_download',
+            args=['..%2Fsettings.py']))
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchRegistrationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+        createTestUser('owner')
+        self.client.login(username='owner', password='12345')
+
+    def gameData(self, *titles, total=None):
+        data = {'form-TOTAL_FORMS': str(total or len(titles)),
+            'form-INITIAL_FORMS': '0'}
+        for index, title in enumerate(titles):
+            data.update({'form-%d-%s' % (index, field): value
+                for field, value in [('title', title), ('gamemaster', 'GM'),
+                    ('system', 'System'), ('num_players', '4'),
+                    ('length', '3'), ('description', 'Description')]})
+        return data
+
+    def postJson(self, kind, items):
+        return self.client.post(reverse('main:register_api', args=[kind]),
+            json.dumps(items), content_type='application/json')
+
+    def test_formset_page(self):
+        response = self.client.get(reverse('main:new_games'), {'count': 4})
+        self.assertEqual(response.context['formset'].total_form_count(), 4)
+
+    def test_formset_skips_blank_forms(self):
+        response = self.client.post(reverse('main:new_games'),
+            self.gameData('Game A', 'Game B', total=3))
+        self.assertRedirects(response, reverse('main:games'))
+        self.assertEqual(set(Game.objects.filter(convention=self.current_con)
+            .values_list('title', flat=True)), {'Game A', 'Game B'})
+        self.current_con.refresh_from_db()
+        self.assertEqual(self.current_con.displayed_game_count, 2)
+        self.assertContains(self.client.get(reverse('main:games')), 'Game B')
+
+    def test_formset_with_an_error_adds_nothing(self):
+        data = self.gameData('Game A', 'Game B')
+        data['form-1-num_players'] = ''
+        response = self.client.post(reverse('main:new_games'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Game.objects.exists())
+
+    def test_one_insert_per_batch(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('main:new_games'),
+                self.gameData(*['Game %d' % i for i in range(10)]))
+        inserts = [q for q in queries.captured_queries
+            if q['sql'].startswith('INSERT INTO "main_game"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Game.objects.count(), 10)
+
+    def test_json_api(self):
+        response = self.postJson('pies', [
+            {'person_name': 'Ann', 'text': 'Apple pie'},
+            {'person_name': 'Bob', 'text': 'Pecan pie'}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(Pie.objects.filter(convention=self.current_con,
+            owner__username='owner').count(), 2)
+        self.assertEqual([Pie.objects.get(pk=pk).text
+            for pk in response.json()['ids']], ['Apple pie', 'Pecan pie'])
+        self.assertEqual(list(search(Pie.objects.all(), 'pecan')),
+            [Pie.objects.get(text='Pecan pie')])
+        self.current_con.refresh_from_db()
+        self.assertEqual(self.current_con.pie_count, 2)
+
+    def test_batches_index_only_their_rows(self):
+        self.postJson('pies', [{'person_name': 'Ann', 'text': 'Apple pie'}])
+        with CaptureQueriesContext(connection) as queries:
+            self.postJson('pies', [{'person_name': 'Bob',
+                'text': 'Pecan pie'}])
+        self.assertFalse([q for q in queries.captured_queries
+            if q['sql'].startswith('DELETE FROM main_pie_fts')
+            and 'WHERE' not in q['sql']])
+        self.assertEqual(list(search(Pie.objects.all(), 'apple')),
+            [Pie.objects.get(text='Apple pie')])
+
+    def test_json_api_errors(self):
+        response = self.postJson('pies', [
+            {'person_name': 'Ann', 'text': 'Apple pie'},
+            {'person_name': 'Bob'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors'][1]), ['text'])
+        self.assertFalse(Pie.objects.exists())
+
+        self.assertEqual(self.postJson('pies', {'text': 'Pie'}).status_code,
+            400)
+        with self.settings(REGISTRATION_BATCH_MAX=2):
+            response = self.postJson('pies',
+                [{'person_name': 'Ann', 'text': 'Pie'}] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['non_form_errors'])
+
+    def test_json_api_needs_login(self):
+        self.client.logout()
+        response = self.postJson('pies', [{'person_name': 'A', 'text': 'B'}])
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """
+    The 'replica' test database is separate and stays empty, so anything read
+    from it is missing from the page.
+    """
+    multi_db = True
+
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+        pie = createPie(text='Primary pie', days=0)
+        pie.person_name = 'Someone'
+        pie.convention = self.current_con
+        pie.save()
+        # Forget that the registry just changed.
+        cache.clear()
+
+    def test_registry_reads_replica(self):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('main:pies'))
+        self.assertNotContains(response, 'Primary pie')
+        self.assertTrue(queries.captured_queries)
+
+    def test_recently_changed_registry_reads_primary(self):
+        pie = Pie.objects.get()
+        pie.text = 'Changed pie'
+        pie.save()
+        self.assertContains(self.client.get(reverse('main:pies')),
+            'Changed pie')
+
+    def test_writer_sticks_to_primary(self):
+        createTestUser('writer')
+        self.client.login(username='writer', password='12345')
+        response = self.client.post(reverse('main:new_pie'),
+            {'person_name': 'Writer', 'text': 'Fresh pie'})
+        self.assertIn('pc_primary_until', response.cookies)
+        cache.clear()
+        self.assertContains(self.client.get(reverse('main:pies')),
+            'Fresh pie')
+
+    def test_reads_without_writes_not_sticky(self):
+        response = self.client.get(reverse('main:pies'))
+        self.assertNotIn('pc_primary_until', response.cookies)
+
+    def test_export_streams_from_replica(self):
+        staff = createTestUser('staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.login(username='staff', password='12345')
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('main:export',
+                args=['pies', 'csv']))
+            content = b''.join(response.streaming_content).decode()
+        self.assertNotIn('Primary pie', content)
+        self.assertTrue([q for q in queries.captured_queries
+            if 'FROM "main_pie"' in q['sql']])
+
+    def test_other_pages_read_primary(self):
+        self.assertContains(self.client.get(reverse('main:search'),
+            {'q': 'Primary'}), 'Primary pie')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertContains(self.client.get(reverse('main:pies')),
+            'Primary pie')
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old_con = createConvention(roman_num='I', days=-365)
+        self.current_con = createConvention(roman_num='II', days=10)
+        self.game = createGame(title='Old game')
+        self.game.convention = self.old_con
+        self.game.save()
+        self.url = reverse('main:archive', args=[self.old_con.pk])
+
+    def test_rendered_once(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Old game')
+        self.assertContains(response, 'PieCon I')
+        self.assertEqual(ConventionArchive.objects.count(), 1)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Old game')
+        self.assertIn('max-age', response['Cache-Control'])
+
+        response = self.client.get(self.url,
+            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_logged_in_navigation(self):
+        """Only the registries are shared; the page shows who's logged in."""
+        self.client.get(self.url)
+        createTestUser('visitor')
+        self.client.login(username='visitor', password='12345')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Old game')
+        self.assertContains(response, 'visitor')
+        self.assertNotContains(response, 'Create Account')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(ConventionArchive.objects.count(), 1)
+
+    def test_served_from_database_after_cache_loss(self):
+        self.client.get(self.url)
+        ConventionArchive.objects.update(html='Stored page')
+        cache.clear()
+        self.assertContains(self.client.get(self.url), 'Stored page')
+
+    def test_edit_renders_again(self):
+        self.client.get(self.url)
+        self.game.title = 'Renamed old game'
+        self.game.save()
+        self.assertFalse(ConventionArchive.objects.exists())
+        self.assertContains(self.client.get(self.url), 'Renamed old game')
+
+    def test_deploy_renders_again(self):
+        self.client.get(self.url)
+        ConventionArchive.objects.update(html='Old deploy')
+        cache.clear()
+        with self.settings(ETAG_SALT='new-deploy'):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Old game')
+
+    def test_current_registrations_leave_archives_alone(self):
+        with CaptureQueriesContext(connection) as queries:
+            game = createGame(title='New game')
+            game.convention = self.current_con
+            game.save()
+        self.assertFalse([q for q in queries.captured_queries
+            if 'main_conventionarchive' in q['sql']])
+
+    def test_not_found(self):
+        self.assertEqual(self.client.get(reverse('main:archive',
+            args=[self.current_con.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('main:archive',
+            args=[self.current_con.pk + 100])).status_code, 404)
+
+    def test_archive_list(self):
+        response = self.client.get(reverse('main:archives'))
+        self.assertContains(response, self.url)
+        self.assertNotContains(response, reverse('main:archive',
+            args=[self.current_con.pk]))
+
+    def test_build_archives(self):
+        out = StringIO()
+        call_command('build_archives', stdout=out)
+        self.assertIn('PieCon I', out.getvalue())
+        self.assertEqual(ConventionArchive.objects.get().convention,
+            self.old_con)
+        out = StringIO()
+        call_command('build_archives', stdout=out)
+        self.assertEqual(out.getvalue(), '')
+
+
+class SchedulingTests(TestCase):
+    days = [date(2026, 11, 6), date(2026, 11, 7)]
+
+    def game(self, pk, gamemaster='GM', length='4', num_players='5'):
+        return Game(id=pk, title='Game %d' % pk, gamemaster=gamemaster,
+            system='System', length=length, num_players=num_players)
+
+    def assertValid(self, schedule, table_seats):
+        """No table or gamemaster is double booked, and every game fits."""
+        busy = set()
+        for placement in schedule.placements:
+            self.assertLessEqual(parse_players(placement.game.num_players),
+                table_seats[placement.table])
+            for hour in range(placement.start, placement.end):
+                keys = [('table', placement.table)] + [('gm', gm)
+                    for gm in parse_gamemasters(placement.game.gamemaster)]
+                for key in keys:
+                    slot = (key, placement.day, hour)
+                    self.assertNotIn(slot, busy)
+                    busy.add(slot)
+
+    def test_parsing(self):
+        self.assertEqual(parse_hours('3'), 3)
+        self.assertEqual(parse_hours('2.5'), 3)
+        self.assertEqual(parse_hours('?'), 4)
+        self.assertEqual(parse_players('3-5'), 5)
+        self.assertEqual(parse_players('lots'), 0)
+        self.assertEqual(parse_gamemasters('Alice & Bob, Carol and Dave'),
+            {'alice', 'bob', 'carol', 'dave'})
+
+    def test_gamemaster_conflicts(self):
+        schedule = schedule_games([self.game(1, 'Alice'),
+            self.game(2, 'Bob & Alice')], self.days[:1], 10, 22, [6, 6])
+        first, second = sorted(schedule.placements, key=lambda p: p.start)
+        self.assertEqual((first.start, second.start), (10, 14))
+        self.assertValid(schedule, [6, 6])
+
+    def test_capacity(self):
+        schedule = schedule_games([self.game(1, num_players='10'),
+            self.game(2, 'Bob', length='20'), self.game(3, 'Carol')],
+            self.days[:1], 10, 22, [8])
+        self.assertEqual([p.game.pk for p in schedule.placements], [3])
+        self.assertEqual(sorted(game.pk for game, reason
+            in schedule.unscheduled), [1, 2])
+
+    def test_full_tables(self):
+        games = [self.game(n, 'GM %d' % n) for n in range(4)]
+        schedule = schedule_games(games, self.days[:1], 10, 22, [6])
+        self.assertEqual([p.start for p in schedule.placements], [10, 14, 18])
+        self.assertEqual(len(schedule.unscheduled), 1)
+
+    def test_hundreds_of_games_quickly(self):
+        games = [self.game(n, 'GM %d' % (n % 40), length=str(n % 5 + 1),
+            num_players=str(n % 8 + 1)) for n in range(600)]
+        table_seats = [8, 8, 6, 6, 6, 6, 4, 4] * 3
+        start = time.perf_counter()
+        schedule = schedule_games(games, self.days, 10, 24, table_seats)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertValid(schedule, table_seats)
+        self.assertEqual(len(schedule.placements) + len(schedule.unscheduled),
+            600)
+
+    def test_grid(self):
+        schedule = schedule_games([self.game(1, length='2')], self.days[:1],
+            10, 13, [6, 6])
+        (day, rows), = schedule.grid()
+        self.assertEqual([(hour, [(p and p.game.pk, span) for p, span
+            in cells]) for hour, cells in rows],
+            [(10, [(1, 2), (None, 1)]), (11, [(None, 1)]),
+                (12, [(None, 1), (None, 1)])])
+
+class ScheduleViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def test_schedule_page(self):
+        game = createGame(title='Scheduled game')
+        game.convention = self.current_con
+        game.save()
+        response = self.client.get(reverse('main:schedule'))
+        self.assertContains(response, 'Scheduled game')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('main:schedule'))
+
+        game = createGame(title='Second game', gamemaster='Other GM')
+        game.convention = self.current_con
+        game.save()
+        self.assertContains(self.client.get(reverse('main:schedule')),
+            'Second game')
+
+class GameNumberFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def formData(self, num_players='4', length='3'):
+        return {'title': 'Title', 'gamemaster': 'GM', 'system': 'System',
+            'num_players': num_players, 'length': length,
+            'description': 'Description'}
+
+    def addGame(self, title, num_players, length):
+        game = createGame(title=title, num_players=num_players, length=length)
+        game.convention = self.current_con
+        game.save()
+        return game
+
+    def test_parsing(self):
+        self.assertEqual(player_range('3-5'), (3, 5))
+        self.assertEqual(player_range('6'), (6, 6))
+        self.assertEqual(player_range('about 4 to 2'), (2, 4))
+        self.assertEqual(player_range('lots'), (None, None))
+        self.assertEqual(length_in_hours('2.5'), 3)
+        self.assertEqual(length_in_hours('4h'), 4)
+        self.assertIsNone(length_in_hours('?'))
+        # Too big for the columns.
+        self.assertEqual(player_range('99999'), (None, None))
+        self.assertEqual(player_range('2-40000'), (None, None))
+
+    def test_save_fills_the_numbers(self):
+        game = self.addGame('Game', '3-5', '4')
+        self.assertEqual((game.min_players, game.max_players,
+            game.length_hours), (3, 5, 4))
+        game.num_players = 'lots'
+        game.save()
+        game.refresh_from_db()
+        self.assertEqual((game.min_players, game.max_players), (None, None))
+
+    def test_form_validation(self):
+        form = GameForm(self.formData(num_players=' 3 - 5 '))
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['num_players'], '3-5')
+        self.assertEqual((form.instance.min_players, form.instance.max_players,
+            form.instance.length_hours), (3, 5, 3))
+        for data in [self.formData(num_players='5-3'),
+                self.formData(num_players='lots'),
+                self.formData(num_players='0'),
+                self.formData(num_players='99999'),
+                self.formData(num_players='2-100'),
+                self.formData(length='2h'), self.formData(length='0')]:
+            self.assertFalse(GameForm(data).is_valid(), data)
+
+    def test_admin_form(self):
+        """The admin checks the numbers but keeps every field."""
+        staff = createTestUser('staff')
+        staff.is_staff = True
+        staff.is_superuser = True
+        staff.save()
+        self.client.login(username='staff', password='12345')
+        game = self.addGame('Game', '4', '3')
+        for url in [reverse('admin:main_game_add'),
+                reverse('admin:main_game_change', args=[game.pk])]:
+            form = self.client.get(url).context['adminform'].form
+            for field in ['owner', 'convention', 'suppress_from_display',
+                    'date_added']:
+                self.assertIn(field, form.fields)
+
+        data = dict(self.formData(num_players='5-3'), owner=staff.pk,
+            date_added_0='2026-01-01', date_added_1='10:00',
+            convention=self.current_con.pk)
+        response = self.client.post(reverse('admin:main_game_add'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['adminform'].form.errors[
+            'num_players'])
+        data['num_players'] = '3-5'
+        response = self.client.post(reverse('admin:main_game_add'), data)
+        self.assertEqual(response.status_code, 302)
+        added = Game.objects.get(title='Title')
+        self.assertEqual((added.owner, added.min_players, added.max_players),
+            (staff, 3, 5))
+
+    def test_filters(self):
+        self.addGame('Duel', '2', '1')
+        self.addGame('Party', '4-8', '3')
+        self.addGame('Epic', '3-5', '6')
+        self.addGame('Unknown', '?', '?')
+
+        def titles(**filters):
+            response = self.client.get(reverse('main:games'), filters)
+            return {game.title for game in response.context['games']}
+
+        self.assertEqual(titles(players=4), {'Party', 'Epic'})
+        self.assertEqual(titles(players=2), {'Duel'})
+        self.assertEqual(titles(max_hours=3), {'Duel', 'Party'})
+        self.assertEqual(titles(min_hours=3, max_hours=6), {'Party', 'Epic'})
+        self.assertEqual(titles(players=4, min_hours=4), {'Epic'})
+        # Invalid filters are ignored.
+        self.assertEqual(titles(players='lots'),
+            {'Duel', 'Party', 'Epic', 'Unknown'})
+
+    def test_filtered_pages(self):
+        for i in range(3):
+            self.addGame('Game %d' % i, '4', '3')
+        response = self.client.get(reverse('main:games'),
+            {'players': 4, 'page_size': 2})
+        self.assertContains(response, '3 games for PieCon')
+        self.assertContains(response, '&amp;players=4"')
+        self.assertNotContains(response, 'data-feed')
+        # The fragment is cached separately from the unfiltered registry.
+        response = self.client.get(reverse('main:games'), {'players': 9})
+        self.assertContains(response, '0 games for PieCon')
+        self.assertContains(self.client.get(reverse('main:games')),
+            'data-feed')
+
+class GameFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.current_con = createConvention(roman_num='II', days=10)
+
+    def addGame(self, title, system='System', gamemaster='GM', length='4',
+            num_players='4'):
+        game = createGame(title=title, system=system, gamemaster=gamemaster,
+            length=length, num_players=num_players)
+        game.convention = self.current_con
+        game.save()
+        return game
+
+    def facets(self, **params):
+        response = self.client.get(reverse('main:games'), params)
+        return {facet.name: [(value.label, value.count, value.selected)
+            for value in facet.values] for facet in response.context['facets']}
+
+    def test_facet_counts(self):
+        self.addGame('A', 'D&D 5e', 'Ann', '3')
+        self.addGame('B', 'D&D 5e', 'Bob', '4')
+        self.addGame('C', 'Fate', 'Ann', '4')
+        hidden = self.addGame('D', 'Fate', 'Ann', '4')
+        hidden.suppress_from_display = True
+        hidden.save()
+
+        facets = self.facets()
+        self.assertEqual(facets['system'],
+            [('D&D 5e', 2, False), ('Fate', 1, False)])
+        self.assertEqual(facets['gamemaster'],
+            [('Ann', 2, False), ('Bob', 1, False)])
+        self.assertEqual(facets['length'],
+            [('4 hours', 2, False), ('3 hours', 1, False)])
+
+        # A facet counts with the other filters, but not its own.
+        facets = self.facets(system='D&D 5e')
+        self.assertEqual(facets['system'],
+            [('D&D 5e', 2, True), ('Fate', 1, False)])
+        self.assertEqual(facets['gamemaster'],
+            [('Ann', 1, False), ('Bob', 1, False)])
+
+    def test_facet_links(self):
+        self.addGame('A', 'D&D 5e', 'Ann')
+        self.addGame('B', 'Fate', 'Bob')
+        response = self.client.get(reverse('main:games'),
+            {'gamemaster': 'Ann', 'sort': 'title'})
+        self.assertEqual([game.title for game in response.context['games']],
+            ['A'])
+        self.assertContains(response,
+            '?gamemaster=Ann&amp;sort=title&amp;system=D%26D+5e"')
+        # The selected value's link drops it.
+        self.assertContains(response, '?sort=title">Ann</a>')
+
+    def test_queries_dont_grow_with_facet_values(self):
+        def queries(systems):
+            Game.objects.all().delete()
+            for i in range(systems):
+                self.addGame('Game %d' % i, 'System %d' % i, 'GM %d' % i,
+                    str(i % 6 + 1))
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                self.client.get(reverse('main:games'), {'players': 4})
+            return len(captured)
+
+        self.assertEqual(queries(3), queries(40))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('main:games'), {'players': 4})
+
+    def test_sorted_pages(self):
+        for title in ['Delta', 'Alpha', 'Charlie', 'Bravo']:
+            self.addGame(title)
+        response = self.client.get(reverse('main:games'),
+            {'sort': 'title', 'page_size': 3})
+        page = response.context['games']
+        self.assertEqual([game.title for game in page],
+            ['Alpha', 'Bravo', 'Charlie'])
+        self.assertNotContains(response, 'data-feed')
+        response = self.client.get(reverse('main:games'),
+            {'sort': 'title', 'page_size': 3, 'after': page.next_cursor})
+        self.assertEqual([game.title for game in response.context['games']],
+            ['Delta'])
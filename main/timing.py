@@ -0,0 +1,123 @@
+"""
+Per-request timings for the ServerTimingMiddleware: how many queries a request
+made and how long they took, how long its templates took to render, and the
+total. The middleware sends them in a Server-Timing header and a log line,
+and keeps the last settings.TIMING_SAMPLES totals per URL name for the
+percentiles on the staff timings page.
+
+Samples are kept in memory, so each worker process has its own.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+_local = threading.local()
+_samples = {}
+_samples_lock = threading.Lock()
+
+class RequestTimings:
+    """The timings collected for one request, in milliseconds."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = None
+        self._rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper, see connection.execute_wrapper()."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.start) * 1000
+
+    def header(self):
+        """The value for the Server-Timing header."""
+        return ('db;dur=%.1f;desc="%d queries", tpl;dur=%.1f, total;dur=%.1f'
+            % (self.db_ms, self.queries, self.template_ms, self.total_ms))
+
+def start():
+    """Start timing the current thread's request."""
+    _local.timings = RequestTimings()
+    return _local.timings
+
+def stop():
+    timings = getattr(_local, 'timings', None)
+    _local.timings = None
+    if timings is not None:
+        timings.finish()
+    return timings
+
+class TimedTemplate(Template):
+    """A Django template whose render time counts towards the request's."""
+    def render(self, context=None, request=None):
+        timings = getattr(_local, 'timings', None)
+        # Templates rendered inside others (like the registry rows) are
+        # already being timed.
+        if timings is None or timings._rendering:
+            return super().render(context, request)
+        timings._rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_ms += (time.perf_counter() - start) * 1000
+            timings._rendering = False
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render times recorded."""
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+def record(url_name, timings):
+    """Add a finished request's timings to the samples for 'url_name'."""
+    samples = _samples.get(url_name)
+    if samples is None:
+        with _samples_lock:
+            samples = _samples.setdefault(url_name,
+                deque(maxlen=settings.TIMING_SAMPLES))
+    samples.append((timings.total_ms, timings.db_ms, timings.queries))
+
+def clear():
+    with _samples_lock:
+        _samples.clear()
+
+def percentile(values, fraction):
+    """The nearest-rank percentile of an already sorted list."""
+    index = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+def summary():
+    """
+    A row per URL name with its request count and total time percentiles,
+    plus mean database time and queries, slowest p95 first.
+    """
+    rows = []
+    for url_name, samples in list(_samples.items()):
+        samples = list(samples)
+        if not samples:
+            continue
+        totals = sorted(sample[0] for sample in samples)
+        rows.append({
+            'url_name': url_name,
+            'count': len(samples),
+            'p50': percentile(totals, 0.50),
+            'p95': percentile(totals, 0.95),
+            'p99': percentile(totals, 0.99),
+            'db_ms': sum(sample[1] for sample in samples) / len(samples),
+            'queries': sum(sample[2] for sample in samples) / len(samples),
+        })
+    return sorted(rows, key=lambda row: row['p95'], reverse=True)
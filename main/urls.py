@@ -1,9 +1,18 @@
 """Defines URL patterns for the main piecon site."""
 
 from django.urls import path
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.views.generic import TemplateView
 
 from . import views
+from .conditional import static_page_etag
+
+def static_page(template_name):
+    """A plain template page that answers repeat visits with a 304."""
+    view = TemplateView.as_view(template_name=template_name)
+    return cache_control(no_cache=True)(
+        condition(etag_func=static_page_etag)(view))
 
 app_name = 'main'
 
@@ -18,6 +27,9 @@ urlpatterns = [
     # Page for creating a new game.
     path('games/new_game', views.new_game, name='new_game'),
 
+    # Page for creating several games at once.
+    path('games/new_games/', views.new_games, name='new_games'),
+
     # Page for editing a game.
     path('games/<int:game_id>/edit_game/', views.edit_game, name='edit_game'),
 
@@ -28,16 +40,36 @@ urlpatterns = [
     # Page for adding a new pie.
     path('pies/new_pie/', views.new_pie, name='new_pie'),
 
+    # Page for adding several pies at once.
+    path('pies/new_pies/', views.new_pies, name='new_pies'),
+
     # Page for editing a pie.
     path('pies/<int:pie_id>/edit_pie/', views.edit_pie, name='edit_pie'),
 
+    # JSON API for registering several games or pies, e.g. api/games/
+    path('api/<slug:kind>/', views.register_api, name='register_api'),
+
+    # Live updates for the registry pages, e.g. feed/games/?after=...
+    path('feed/<slug:name>/', views.feed, name='feed'),
+
+    # This year's games in time slots and tables.
+    path('schedule/', views.schedule, name='schedule'),
+
+    # Past conventions, and the games and pies of each.
+    path('archive/', views.archives, name='archives'),
+    path('archive/<int:convention_id>/', views.archive, name='archive'),
+
+    # Search the games and pies.
+    path('search/', views.search, name='search'),
+
+    # Staff-only export of the database, e.g. export/games.csv
+    path('export/<slug:name>.<slug:format>', views.export, name='export'),
+
     # About page
     # path('about/', views.about, name='about'),
-    path('about/', TemplateView.as_view(
-        template_name="main/about.html"), name='about'),
+    path('about/', static_page("main/about.html"), name='about'),
 
     # Volunteer page
     #path('volunteer/', views.volunteer, name='volunteer'),
-    path('volunteer/', TemplateView.as_view(
-        template_name="main/volunteer.html"), name='volunteer'),
+    path('volunteer/', static_page("main/volunteer.html"), name='volunteer'),
 ]
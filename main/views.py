@@ -1,69 +1,235 @@
+import json
+
 from django.shortcuts import render
 from django.urls import reverse
-from django.http import HttpResponseRedirect, Http404
+from django.http import (HttpResponseRedirect, Http404, JsonResponse,
+    StreamingHttpResponse)
+from django.views.decorators.http import require_POST
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject, cached_property, lazy
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
 from django.views import generic
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import condition
 
-from .models import Pie, Game, Convention
-from .forms import PieForm, GameForm
+from piecon.routers import pin_to_primary, read_database
 
-def get_current_con():
-    # Get the current upcoming convention.
-    try:
-        return Convention.objects.latest('start_date')
-    except:
-        return None
+from .archive import get_archive, past_conventions
+from .caching import (get_current_con, get_registry_version,
+    registry_recently_changed)
+from .conditional import (archive_etag, index_etag, registry_etag,
+    schedule_etag)
+from .export import stream_export
+from .facets import facet_counts, filter_games
+from .feed import changes, latest_cursor
+from .pagination import KeysetPaginationMixin
+from .registration import formset_data, get_formset_class, save_formset
+from .rendering import game_rows, pie_rows
+from .scheduling import schedule_convention
+from .search import search as search_registry
+from .models import Pie, Game
+from .forms import PieForm, GameForm, GameFilterForm
 
+@cache_control(no_cache=True)
+@condition(etag_func=index_etag)
 def index(request):
     """The home page for the PieCon site."""
-    current_con = get_current_con()
+    current_con = get_current_con(request)
     context = {'current_con': current_con}
     return render(request, 'main/index.html', context)
 
-class GamesView(generic.ListView):
+# The change feed cursor for a registry page, only looked up if the page's
+# cached fragment needs rendering.
+lazy_latest_cursor = lazy(lambda queryset: latest_cursor(queryset) or '', str)
+
+@method_decorator(cache_control(no_cache=True), name='dispatch')
+@method_decorator(condition(etag_func=registry_etag(Game)), name='dispatch')
+class GamesView(KeysetPaginationMixin, generic.ListView):
     """Page for showing all games for the current year's PieCon."""
     template_name = 'main/games.html'
     context_object_name = 'games'
 
+    # The sorts GameFilterForm offers, as (field, highest first). Each has an
+    # index for the displayed games of a convention (see Game.Meta).
+    sort_orders = {
+        'newest': ('date_added', True),
+        'title': ('title', False),
+        'system': ('system', False),
+    }
+
+    @cached_property
+    def filter_form(self):
+        return GameFilterForm(self.request.GET)
+
+    def get_filters(self):
+        """The registry filters in the query string (see GameFilterForm)."""
+        return self.filter_form.filters()
+
+    def get_keyset_order(self):
+        return self.sort_orders[self.filter_form.sort_order()]
+
     def get_queryset(self):
-        return Game.objects.filter(
-            convention=get_current_con(),
+        current_con = get_current_con(self.request)
+        # Rendered and cached for everyone, so not from a lagging replica.
+        if registry_recently_changed(Game,
+                current_con.pk if current_con else None):
+            pin_to_primary()
+        games = Game.objects.filter(
+            convention=current_con,
             suppress_from_display=False).order_by('-date_added')
+        return filter_games(games, self.get_filters())
 
     def get_context_data(self, **kwargs):
         """For passing current convention info to the ListView."""
         # Call the base implementation first to get the context
         context = super(GamesView, self).get_context_data(**kwargs)
         # Create any data and add it to the context
-        context['current_con'] = get_current_con()
+        current_con = get_current_con(self.request)
+        context['current_con'] = current_con
+        # The rendered list is cached until a game is added or changed.
+        context['registry_version'] = get_registry_version(Game,
+            current_con.pk if current_con else None)
+        context['registry_cache_timeout'] = settings.REGISTRY_CACHE_TIMEOUT
+        context['game_rows'] = game_rows(context['games'])
+        context['filter_form'] = self.filter_form
+
+        filters = self.get_filters()
+        sort = self.filter_form.sort_order()
+        extra = {'sort': sort} if sort != 'newest' else {}
+        context['filtered'] = bool(filters)
+        # Part of the fragment's cache key and of the "Load more" link.
+        context['filter_query'] = urlencode(sorted(
+            dict(filters, **extra).items()))
+        # Only worked out if the cached fragment needs rendering.
+        context['facets'] = SimpleLazyObject(lambda: facet_counts(
+            current_con.pk if current_con else None, filters, extra))
+        if not context['filter_query']:
+            # The change feed only follows the whole registry, newest first.
+            context['feed_cursor'] = lazy_latest_cursor(self.get_queryset())
         return context
 
 
-class PiesView(generic.ListView):
+@method_decorator(cache_control(no_cache=True), name='dispatch')
+@method_decorator(condition(etag_func=registry_etag(Pie)), name='dispatch')
+class PiesView(KeysetPaginationMixin, generic.ListView):
     """Page for showing all pies for the current year's PieCon."""
     template_name = 'main/pies.html'
     context_object_name = 'pies'
 
     def get_queryset(self):
         #return Pie.objects.filter(date_added__year=current_year).order_by('-date_added')
-        return Pie.objects.filter(convention=get_current_con()).order_by('-date_added')
+        current_con = get_current_con(self.request)
+        # Rendered and cached for everyone, so not from a lagging replica.
+        if registry_recently_changed(Pie,
+                current_con.pk if current_con else None):
+            pin_to_primary()
+        return Pie.objects.filter(
+            convention=current_con).order_by('-date_added')
 
     def get_context_data(self, **kwargs):
         """For passing current convention info to the ListView."""
         # Call the base implementation first to get the context
         context = super(PiesView, self).get_context_data(**kwargs)
         # Create any data and add it to the context
-        context['current_con'] = get_current_con()
+        current_con = get_current_con(self.request)
+        context['current_con'] = current_con
+        # The rendered list is cached until a pie is added or changed.
+        context['registry_version'] = get_registry_version(Pie,
+            current_con.pk if current_con else None)
+        context['registry_cache_timeout'] = settings.REGISTRY_CACHE_TIMEOUT
+        context['pie_rows'] = pie_rows(context['pies'])
+        context['feed_cursor'] = lazy_latest_cursor(self.get_queryset())
         return context
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=schedule_etag)
+def schedule(request):
+    """This year's games fitted into time slots and tables."""
+    current_con = get_current_con(request)
+    context = {'current_con': current_con}
+    if current_con is not None:
+        # Only worked out if the cached grid is out of date.
+        context['schedule'] = SimpleLazyObject(
+            lambda: schedule_convention(current_con))
+        context['registry_version'] = get_registry_version(Game,
+            current_con.pk)
+        context['registry_cache_timeout'] = settings.REGISTRY_CACHE_TIMEOUT
+    return render(request, 'main/schedule.html', context)
+
+
+def search(request):
+    """Search this year's games and pies."""
+    query = request.GET.get('q', '').strip()
+    current_con = get_current_con(request)
+    games = pies = []
+    if query:
+        limit = settings.SEARCH_RESULTS_LIMIT
+        games = search_registry(Game.objects.filter(convention=current_con,
+            suppress_from_display=False), query)[:limit]
+        pies = search_registry(Pie.objects.filter(convention=current_con),
+            query)[:limit]
+
+    context = {'query': query, 'game_rows': game_rows(games),
+        'pie_rows': pie_rows(pies), 'current_con': current_con}
+    return render(request, 'main/search.html', context)
+
+
+@never_cache
+def feed(request, name):
+    """
+    JSON list of this year's games or pies changed since the 'after' cursor,
+    waiting up to 'wait' seconds for a change if there isn't one yet.
+    """
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = 0
+    try:
+        data = changes(name, get_current_con(request),
+            request.GET.get('after'), wait)
+    except ValueError:
+        raise Http404
+    return JsonResponse(data)
+
+
+def archives(request):
+    """List of the past conventions."""
+    context = {'conventions': past_conventions()}
+    return render(request, 'main/archives.html', context)
+
+
+@condition(etag_func=archive_etag)
+def archive(request, convention_id):
+    """A past convention's games and pies, rendered once and then stored."""
+    snapshot = get_archive(convention_id)
+    if snapshot is None:
+        raise Http404
+    context = {'convention': snapshot.convention,
+        'rows': mark_safe(snapshot.html)}
+    response = render(request, 'main/archive.html', context)
+    if request.user.is_authenticated:
+        # The navigation bar shows who's logged in.
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True,
+            max_age=settings.ARCHIVE_MAX_AGE)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
 @login_required
 def edit_pie(request, pie_id):
     """Page for editing a pie."""
 
     pie = Pie.objects.get(id=pie_id)
-    if pie.owner != request.user:
+    if pie.owner_id != request.user.id:
         raise Http404
 
     if request.method != 'POST':
@@ -93,7 +259,7 @@ def new_pie(request):
             new_pie = form.save(commit=False)
             new_pie.owner = request.user
             new_pie.date_added = timezone.now()
-            new_pie.convention = get_current_con()
+            new_pie.convention = get_current_con(request)
             new_pie.save()
             return HttpResponseRedirect(reverse('main:pies'))
 
@@ -115,19 +281,78 @@ def new_game(request):
             new_game = form.save(commit=False)
             new_game.owner = request.user
             new_game.date_added = timezone.now()
-            new_game.convention = get_current_con()
+            new_game.convention = get_current_con(request)
             new_game.save()
             return HttpResponseRedirect(reverse('main:games'))
 
     context = {'form': form}
     return render(request, 'main/new_game.html', context)
 
+def register_batch(request, kind, template_name):
+    """Add several games or pies at once from a formset."""
+    if request.method != 'POST':
+        # No data submitted; a blank form per item, as many as asked for.
+        try:
+            count = int(request.GET.get('count', 3))
+        except ValueError:
+            count = 3
+        count = min(max(count, 1), settings.REGISTRATION_BATCH_MAX)
+        formset = get_formset_class(kind, extra=count - 1)()
+    else:
+        # POST data submitted; process data.
+        formset = get_formset_class(kind)(request.POST)
+        if formset.is_valid():
+            save_formset(formset, request.user, get_current_con(request))
+            return HttpResponseRedirect(reverse('main:' + kind))
+
+    context = {'formset': formset}
+    return render(request, template_name, context)
+
+@login_required
+def new_games(request):
+    """Add several new games at once."""
+    return register_batch(request, 'games', 'main/new_games.html')
+
+@login_required
+def new_pies(request):
+    """Add several new pies at once."""
+    return register_batch(request, 'pies', 'main/new_pies.html')
+
+@require_POST
+def register_api(request, kind):
+    """
+    Add several games or pies at once from a JSON list of objects with the
+    same fields as the forms. All are added, or none if any has errors.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': "Login required."}, status=401)
+    if kind not in ['games', 'pies']:
+        raise Http404
+    try:
+        items = json.loads(request.body.decode('utf-8'))
+    except ValueError:
+        return JsonResponse({'error': "Invalid JSON."}, status=400)
+    if (not isinstance(items, list) or
+            not all(isinstance(item, dict) for item in items)):
+        return JsonResponse({'error': "Expected a list of objects."},
+            status=400)
+
+    formset = get_formset_class(kind)(formset_data(items))
+    if not formset.is_valid():
+        return JsonResponse({
+            'errors': [form.errors.get_json_data() for form in formset],
+            'non_form_errors': formset.non_form_errors().get_json_data(),
+        }, status=400)
+    objects = save_formset(formset, request.user, get_current_con(request))
+    return JsonResponse({'created': len(objects),
+        'ids': [obj.pk for obj in objects]}, status=201)
+
 @login_required
 def edit_game(request, game_id):
     """Edit an existing game."""
 
     game = Game.objects.get(id=game_id)
-    if game.owner != request.user:
+    if game.owner_id != request.user.id:
         raise Http404
 
     if request.method != 'POST':
@@ -143,6 +368,22 @@ def edit_game(request, game_id):
     context = {'game': game, 'form': form}
     return render(request, 'main/edit_game.html', context)
 
+@staff_member_required
+def export(request, name, format):
+    """Stream a whole table (or all of them) as CSV or NDJSON, for staff."""
+    try:
+        # The stream is read after the response is returned, so pick the
+        # database now.
+        lines = stream_export(name, format, using=read_database())
+    except ValueError:
+        raise Http404
+
+    content_types = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+    response = StreamingHttpResponse(lines, content_type=content_types[format])
+    response['Content-Disposition'] = (
+        'attachment; filename="piecon-%s.%s"' % (name, format))
+    return response
+
 
 # DEPRECATED FUNCTIONS
 
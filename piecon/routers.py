@@ -0,0 +1,105 @@
+"""
+Read replica routing.
+
+The pages named in settings.REPLICA_URL_NAMES (the home page, the registries
+and the exports) read from one of the database aliases in
+settings.DATABASE_REPLICAS, picked at random. Everything else, and every
+write, uses the primary ('default') database.
+
+A visitor who has just written anything is pinned to the primary for
+settings.REPLICA_STICKY_SECONDS with a cookie, so they see their own changes
+straight away even if the replicas are lagging. Values that are cached for
+everyone (the current convention, logged in users) are always loaded from the
+primary with use_primary(), so a lagging replica can't put stale copies in
+the cache.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+STICKY_COOKIE = 'pc_primary_until'
+
+_state = threading.local()
+
+def _replica():
+    """The replica alias to read from right now, or None for the primary."""
+    if getattr(_state, 'use_replica', False) and settings.DATABASE_REPLICAS:
+        return random.choice(settings.DATABASE_REPLICAS)
+    return None
+
+def read_database():
+    """
+    The database alias reads go to right now. For querysets evaluated after
+    the response is returned, e.g. a streamed one, when the middleware has
+    already stopped routing to the replicas.
+    """
+    return _replica() or 'default'
+
+def pin_to_primary():
+    """Read from the primary for the rest of the current request."""
+    _state.use_replica = False
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the with block."""
+    previous = getattr(_state, 'use_replica', False)
+    _state.use_replica = False
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+class ReplicaRouter:
+    """Sends reads to a replica when the current request allows it."""
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'sessions':
+            # A session saved a moment ago must be there on the next request.
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Follow relations on the database the instance came from.
+            return instance._state.db
+        return _replica()
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same data as the primary.
+        return True
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets the pages in settings.REPLICA_URL_NAMES read from a replica, unless
+    the visitor is pinned to the primary after writing.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.use_replica = False
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            if _state.wrote:
+                until = int(time.time() + settings.REPLICA_STICKY_SECONDS)
+                response.set_cookie(STICKY_COOKIE, str(until),
+                    max_age=settings.REPLICA_STICKY_SECONDS, httponly=True)
+            return response
+        finally:
+            _state.use_replica = False
+            _state.wrote = False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.view_name not in settings.REPLICA_URL_NAMES:
+            return None
+        try:
+            pinned = float(request.COOKIES[STICKY_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            pinned = False
+        _state.use_replica = not pinned
+        return None
@@ -11,6 +11,9 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 """
 
 import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -47,11 +50,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.ServerTimingMiddleware',
+    'main.middleware.ProfilerMiddleware',
+    'piecon.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -60,12 +66,13 @@ ROOT_URLCONF = 'piecon.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, timing renders for the ServerTimingMiddleware.
+        'BACKEND': 'main.timing.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [
             os.path.join(BASE_DIR, 'templates'),
             os.path.join(BASE_DIR, 'piecon/templates'),
             ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -73,10 +80,35 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory in development too, so
+            # restart runserver after editing one.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# The registry rows (see main/rendering.py) are rendered with Jinja2 when it's
+# installed, from the templates in main/jinja2/.
+try:
+    import jinja2
+except ImportError:
+    REGISTRY_ROWS_ENGINE = 'django'
+else:
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'main.rendering.jinja2_environment',
+        },
+    })
+    REGISTRY_ROWS_ENGINE = 'jinja2'
+
 WSGI_APPLICATION = 'piecon.wsgi.application'
 
 
@@ -87,10 +119,52 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    },
+    # A stand-in read replica for trying out piecon/routers.py locally: copy
+    # db.sqlite3 to db-replica.sqlite3 and set PC_USE_REPLICA=1.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+    },
+}
+
+# Read replicas (see piecon/routers.py): the database aliases the pages in
+# REPLICA_URL_NAMES read from, and how long a visitor reads from the primary
+# after writing anything, or a registry after it changes, in seconds.
+DATABASE_ROUTERS = ['piecon.routers.ReplicaRouter']
+DATABASE_REPLICAS = ['replica'] if os.environ.get('PC_USE_REPLICA') else []
+REPLICA_URL_NAMES = ['main:index', 'main:games', 'main:pies', 'main:export']
+REPLICA_STICKY_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.0/topics/cache/
+# Cached values are cleared by signal handlers when the data changes, and
+# that only reaches the cache of the process that made the change. The local
+# memory cache is only for development (one runserver process); production
+# uses Redis, see the Heroku settings below, and won't start without it.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'piecon',
     }
 }
 
 
+# Sessions are read from the cache and only written through to the database.
+# Visitors without a session cookie never touch the session store at all.
+# Logging out deletes the cached session, which must reach every process, so
+# this has to be a shared cache (checked at the end of this file).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'default'
+
+# How long (in seconds) a logged in user is kept in the cache, see
+# users/caching.py. Saving the user (e.g. a new password, or deactivating
+# them) clears it straight away, in the shared 'default' cache.
+USER_CACHE_TIMEOUT = 60 * 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
 
@@ -129,9 +203,84 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# The site's own CSS and JavaScript, bundled and minified by
+# 'manage.py build_assets' (see main/assets.py). Bundle names are static file
+# names, each made from the listed source static files.
+ASSET_BUNDLES = {
+    'main/dist/site.css': ['main/style.css'],
+    'main/dist/site.js': ['main/script.js'],
+}
+
 # My settings
 LOGIN_URL = '/users/login/'
 
+# Number of games/pies shown per page of the registries, and the largest page
+# a visitor can ask for with ?page_size=
+REGISTRY_PAGE_SIZE = 50
+REGISTRY_MAX_PAGE_SIZE = 200
+
+# Most games or pies registered in one go (main/registration.py).
+REGISTRATION_BATCH_MAX = 20
+
+# Most games (and most pies) shown for a search.
+SEARCH_RESULTS_LIMIT = 50
+
+# Admin changelists stop counting rows here, so paging through a very large
+# table shows at most this many rows' worth of pages. Use search or the
+# filters to narrow it down.
+ADMIN_COUNT_LIMIT = 10000
+
+# Mixed into the ETags of the public pages (see main/conditional.py). Changing
+# it, e.g. per release, makes browsers fetch every page afresh.
+ETAG_SALT = os.environ.get('SOURCE_VERSION', '')
+
+# How long (in seconds) a rendered page of a registry is kept in the cache.
+# Edits never wait for this, they switch to a new version of the fragment.
+REGISTRY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# The game schedule (main/scheduling.py): the hours games can run each day of
+# the convention, and the seats at each table.
+SCHEDULE_DAY_START = 10
+SCHEDULE_DAY_END = 24
+SCHEDULE_TABLE_SEATS = [8, 8, 6, 6, 6, 6]
+
+# Past conventions' archived registries (main/archive.py) are kept in the
+# cache for ARCHIVE_CACHE_TIMEOUT seconds between database reads, and visitors
+# who aren't logged in may reuse archive pages for ARCHIVE_MAX_AGE seconds.
+ARCHIVE_CACHE_TIMEOUT = 60 * 60
+ARCHIVE_MAX_AGE = 60 * 60 * 24
+
+# The registry change feed (main/feed.py): most rows per response, the longest
+# a request may wait for a change and how often a waiting request checks for
+# one, and how long browsers wait before asking again after an empty response,
+# in seconds. A waiting request holds a whole worker, so with the Procfile's
+# sync gunicorn workers requests don't wait at all; set PC_FEED_MAX_WAIT (under
+# Heroku's 30 second request timeout) only when running async workers, e.g.
+# 'gunicorn -k gevent'.
+FEED_PAGE_SIZE = 100
+FEED_MAX_WAIT = float(os.environ.get('PC_FEED_MAX_WAIT', 0))
+FEED_POLL_INTERVAL = 1
+FEED_RETRY = 15
+
+# How many recent requests per URL name the timings page works out its
+# percentiles from (see main/timing.py).
+TIMING_SAMPLES = 1000
+
+# Profiling production requests (see main/profiling.py), off unless set in
+# the environment: the fraction of requests to profile with cProfile, and the
+# time in milliseconds over which a request's sampled stacks are kept. Only
+# the pages named in PC_PROFILE_URL_NAMES (comma separated) are profiled if
+# it's set, and only the newest PROFILE_KEEP profiles are kept.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PC_PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = (float(os.environ['PC_PROFILE_SLOW_MS'])
+    if os.environ.get('PC_PROFILE_SLOW_MS') else None)
+PROFILE_URL_NAMES = (os.environ['PC_PROFILE_URL_NAMES'].split(',')
+    if os.environ.get('PC_PROFILE_URL_NAMES') else None)
+PROFILE_INTERVAL = 0.005
+PROFILE_KEEP = 50
+PROFILE_DIR = os.environ.get('PC_PROFILE_DIR',
+    os.path.join(tempfile.gettempdir(), 'piecon-profiles'))
+
 # Settings for django-bootstrap3
 BOOTSTRAP3 = {
     'include_jquery': True,
@@ -148,6 +297,27 @@ if cwd == '/app' or cwd[:4] == '/tmp':
             'default': dj_database_url.config(default='postgres://localhost')
         }
 
+    # Follower databases to read from, as comma separated URLs.
+    DATABASE_REPLICAS = []
+    for number, url in enumerate(
+            os.environ.get('PC_REPLICA_URLS', '').split(','), start=1):
+        if url.strip():
+            alias = 'replica%d' % number
+            DATABASES[alias] = dj_database_url.parse(url.strip())
+            DATABASE_REPLICAS.append(alias)
+
+    # A cache shared by every gunicorn worker (and dyno), from the Heroku
+    # Redis add-on.
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+
     # Redirect http requests to https
     SECURE_SSL_REDIRECT =  True
 
@@ -173,3 +343,24 @@ if cwd == '/app' or cwd[:4] == '/tmp':
     EMAIL_HOST_USER = os.environ.get('MAILGUN_SMTP_LOGIN', '')
     EMAIL_HOST_PASSWORD = os.environ.get('MAILGUN_SMTP_PASSWORD', '')
     DEFAULT_FROM_EMAIL = 'PieCon <no-reply@piecon.com>'
+
+    # Send the per-request timing lines to the Heroku logs.
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'console': {'class': 'logging.StreamHandler'},
+        },
+        'loggers': {
+            'main.timing': {'handlers': ['console'], 'level': 'INFO'},
+        },
+    }
+
+# Each process's local memory cache would keep serving whatever it has cached
+# after another process changes it (see CACHES above), including logged out
+# sessions and users' old passwords.
+for alias in {'default', SESSION_CACHE_ALIAS}:
+    if not DEBUG and CACHES[alias]['BACKEND'].endswith('.LocMemCache'):
+        raise ImproperlyConfigured("The '%s' cache must be shared between "
+            "processes when DEBUG is off, the local memory cache isn't."
+            % alias)
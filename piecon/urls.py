@@ -17,7 +17,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls import url
 
+from main.admin import profile_download_view, profiles_view, timings_view
+
 urlpatterns = [
+    path('admin/timings/', admin.site.admin_view(timings_view),
+        name='admin_timings'),
+    path('admin/profiles/', admin.site.admin_view(profiles_view),
+        name='admin_profiles'),
+    path('admin/profiles/<str:name>', admin.site.admin_view(
+        profile_download_view), name='admin_profile_download'),
     path('admin/', admin.site.urls),
     path('users/', include('users.urls')),
     path('', include('main.urls')),
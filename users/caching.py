@@ -0,0 +1,54 @@
+"""
+A read-through cache of logged in users, so that a request from a logged in
+user doesn't need a query to load them. Cached users are cleared by the signal
+handlers in users/signals.py whenever a User is saved (e.g. by the change
+password and edit email pages) or deleted.
+"""
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+    SESSION_KEY, get_user_model, load_backend)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+from piecon.routers import use_primary
+
+def _user_cache_key(user_id):
+    return 'users:user:%s' % user_id
+
+def get_cached_user(request):
+    """
+    Return the user logged in to the request's session, like
+    django.contrib.auth.get_user(), but from the cache when possible.
+    """
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    key = _user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        # Never cache a copy from a lagging read replica.
+        with use_primary():
+            user = load_backend(backend_path).get_user(user_id)
+        if user is None:
+            return AnonymousUser()
+        cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+
+    # Verify the session, as get_user() does, so changing the password still
+    # logs out other sessions.
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(session_hash,
+            user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+def invalidate_user(user_id):
+    """Forget the cached copy of a user."""
+    cache.delete(_user_cache_key(user_id))
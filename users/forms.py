@@ -2,6 +2,16 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.contrib.auth.models import User
 
+def users_with_email(email):
+    """
+    Return the users with the given email address, ignoring case. The query is
+    written to match the users_email_lower_uniq index exactly (see migration
+    users 0001), so it's an index probe rather than a table scan.
+    """
+    return User.objects.extra(
+        where=['LOWER("auth_user"."email") = %s', '"auth_user"."email" <> \'\''],
+        params=[email.lower()])
+
 class SignUpForm(UserCreationForm):
     email = forms.EmailField(max_length=254,
         help_text='Please provide a valid email address.',
@@ -14,14 +24,22 @@ class SignUpForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        if users_with_email(email).exists():
             raise forms.ValidationError(self.fields['email'].error_messages['exists'])
         return email
 
 class EmailEditForm(forms.ModelForm):
 
-    email = forms.EmailField(max_length=254, label='Email Address')
+    email = forms.EmailField(max_length=254, label='Email Address',
+        error_messages={'exists':
+            'Already exists, please use a different email address.'})
 
     class Meta:
         model = User
-        fields = ('email',)
\ No newline at end of file
+        fields = ('email',)
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if users_with_email(email).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError(self.fields['email'].error_messages['exists'])
+        return email
@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+# A unique index on the lower-cased email address, so that sign-up and email
+# changes can look an address up with an index probe, and so that two accounts
+# can't share an address that differs only in case. Blank addresses (which
+# Django allows) are left out of the index.
+
+def check_for_duplicates(apps, schema_editor):
+    """Fail with a readable message rather than an IntegrityError."""
+    User = apps.get_model('auth', 'User')
+    db = schema_editor.connection.alias
+    emails = (User.objects.using(db).exclude(email='')
+        .annotate(email_lower=Lower('email')).values_list('email_lower',
+            flat=True))
+    seen = set()
+    duplicates = set()
+    for email in emails.iterator():
+        if email in seen:
+            duplicates.add(email)
+        seen.add(email)
+    if duplicates:
+        raise RuntimeError("These email addresses belong to more than one "
+            "user (ignoring case), fix them before migrating: %s"
+            % ', '.join(sorted(duplicates)))
+
+def create_index(apps, schema_editor):
+    schema_editor.execute("CREATE UNIQUE INDEX users_email_lower_uniq ON "
+        "auth_user (LOWER(email)) WHERE email <> ''")
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX users_email_lower_uniq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0009_alter_user_last_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_for_duplicates, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
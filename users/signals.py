@@ -0,0 +1,12 @@
+"""Signal handlers that keep the cached users in users/caching.py fresh."""
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .caching import invalidate_user
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """A changed password, email, etc. must not be served from the cache."""
+    invalidate_user(instance.pk)
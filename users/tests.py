@@ -1,7 +1,11 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
 
+from .forms import EmailEditForm, SignUpForm, users_with_email
+
 def createTestUser(username):
     """
     Try to make a user with the given username. If they already exist, just
@@ -76,3 +80,90 @@ class NewAccountPageTests(TestCase):
         # Expect to be redirected to index page instead.
         expected_redirect = reverse('main:index')
         self.assertRedirects(response, expected_redirect, 302)
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = createTestUser(username='testuser')
+        self.client.login(username='testuser', password='12345')
+
+    def test_logged_in_request_needs_no_queries(self):
+        """The session and the user both come from the cache."""
+        self.client.get(reverse('main:about'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('main:about'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_edit_email_refreshes_cached_user(self):
+        """A new email address is seen on the next request."""
+        self.client.get(reverse('users:settings'))
+        self.client.post(reverse('users:edit_email'),
+            {'email': 'new@example.com'})
+        response = self.client.get(reverse('users:edit_email'))
+        self.assertEqual(response.context['user'].email, 'new@example.com')
+
+    def test_password_change_keeps_session_and_logs_out_others(self):
+        """
+        Changing the password keeps this session logged in, but other
+        sessions of the same user are logged out even with a warm cache.
+        """
+        other = Client()
+        other.login(username='testuser', password='12345')
+        other.get(reverse('users:settings'))
+
+        response = self.client.post(reverse('users:change_password'), {
+            'old_password': '12345', 'new_password1': 'pie-and-dice-99',
+            'new_password2': 'pie-and-dice-99'})
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get(reverse('users:settings'))
+        self.assertEqual(response.status_code, 200)
+        response = other.get(reverse('users:settings'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_anonymous_visitors_skip_session_store(self):
+        """A visitor without a session cookie never loads a session."""
+        self.client.logout()
+        cache.clear()
+        self.client.get(reverse('main:games'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('main:games'))
+        self.assertNotIn('sessionid', response.cookies)
+
+class EmailUniquenessTests(TestCase):
+    def setUp(self):
+        self.user = createTestUser(username='testuser')
+        self.user.email = 'Pie.Lover@Example.com'
+        self.user.save()
+
+    def test_sign_up_rejects_email_in_other_case(self):
+        form = SignUpForm(data={'username': 'newuser',
+            'email': 'pie.lover@example.COM', 'password1': 'pie-and-dice-99',
+            'password2': 'pie-and-dice-99'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+
+    def test_edit_email_rejects_another_users_email(self):
+        other = createTestUser(username='other')
+        form = EmailEditForm(data={'email': 'PIE.LOVER@example.com'},
+            instance=other)
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+
+    def test_edit_email_allows_own_email_in_new_case(self):
+        form = EmailEditForm(data={'email': 'pie.lover@example.com'},
+            instance=self.user)
+        self.assertTrue(form.is_valid())
+
+    def test_database_rejects_duplicates_but_allows_blanks(self):
+        createTestUser(username='blank1')
+        createTestUser(username='blank2')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create(username='dupe', email='pie.lover@example.com')
+
+    def test_lookup_uses_index(self):
+        """The lookup is an index probe, not a scan of auth_user."""
+        sql, params = users_with_email('a@example.com').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING INDEX users_email_lower_uniq', plan)